@@ -1,7 +1,13 @@
-from flask import Flask, jsonify, request
+from flask import Flask, jsonify, request, g
 from flask_cors import CORS
-from database_manager import DatabaseManager
+from database_manager import DatabaseManager, encode_cursor
+from response_cache import ResponseCache, PublishedResponses, choose_encoding
+from datetime import datetime, timezone
+from functools import wraps, lru_cache
+from urllib.parse import urlencode
+import hashlib
 import logging
+import time
 
 # 配置日志
 logging.basicConfig(
@@ -12,9 +18,195 @@ logging.basicConfig(
 app = Flask(__name__)
 # 添加CORS支持，允许所有来源访问
 CORS(app, resources={r"/api/*": {"origins": "*"}})
-db_manager = DatabaseManager()
+# API只读数据库，连接由连接池复用
+db_manager = DatabaseManager(read_only=True)
+# 响应缓存：数据只在导入时变化，导入会递增数据代数使缓存整体失效
+response_cache = ResponseCache(max_entries=256)
+
+def request_key():
+    """路由加排序后的查询参数，同一查询的不同参数顺序视为同一个请求"""
+    return (request.path, tuple(sorted(request.args.items(multi=True))))
+
+@lru_cache(maxsize=64)
+def http_time(local_time):
+    """把数据库中的本地时间转换为 Last-Modified 使用的UTC时间"""
+    try:
+        return datetime.strptime(local_time, "%Y-%m-%d %H:%M:%S").astimezone(timezone.utc)
+    except (TypeError, ValueError):
+        return None
+
+def conditional(time_bucket=None):
+    """条件请求支持：强ETag由数据代数和查询生成，Last-Modified取数据代数最近一次变化的时间
+    
+    If-None-Match 或 If-Modified-Since 命中时直接返回304，不查询数据也不序列化。
+    结果随当前时间变化的接口传入 time_bucket（秒），ETag 每个时间段更新一次。
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            version = db_manager.get_data_version()
+            if version is None:
+                return view(*args, **kwargs)
+            g.generation = version['generation']
+            
+            tag = f"{version['generation']}|{request_key()}"
+            if time_bucket:
+                tag += f"|{int(time.time() // time_bucket)}"
+            etag = hashlib.sha1(tag.encode('utf-8')).hexdigest()
+            last_modified = http_time(version['updated_at'])
+            
+            # 常用请求直接使用发布好的字节串，按 Accept-Encoding 选择压缩版本
+            published_responses.ensure(version['generation'])
+            published = None if time_bucket else published_responses.get(request_key(), version['generation'])
+            if published is not None:
+                variants, mimetype = published
+                encoding = choose_encoding(request.accept_encodings, variants)
+                # 不同编码的内容不同，强ETag也要区分
+                variant_etags = [etag if name == 'identity' else f"{etag}-{name}" for name in variants]
+                etag = etag if encoding == 'identity' else f"{etag}-{encoding}"
+            else:
+                variant_etags = [etag]
+            
+            if request.if_none_match:
+                not_modified = any(request.if_none_match.contains(tag) for tag in variant_etags)
+            else:
+                not_modified = (last_modified is not None and not time_bucket
+                                and request.if_modified_since is not None
+                                and last_modified.replace(microsecond=0) <= request.if_modified_since)
+            
+            if not_modified:
+                response = app.response_class(status=304)
+            elif published is not None:
+                response = app.response_class(variants[encoding], mimetype=mimetype)
+                if encoding != 'identity':
+                    response.headers['Content-Encoding'] = encoding
+                response.headers['X-Cache'] = 'PUBLISHED'
+            else:
+                response = app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            if published is not None:
+                response.vary.add('Accept-Encoding')
+            if last_modified is not None:
+                response.last_modified = last_modified
+            # 允许缓存但每次都要重新验证，避免浏览器按 Last-Modified 启发式地直接使用旧数据
+            response.cache_control.no_cache = True
+            return response
+        return wrapper
+    return decorator
+
+def cached(view):
+    """按路由和查询参数缓存成功的响应，数据代数变化后重新查询"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        generation = g.get('generation') or db_manager.get_generation()
+        if generation is None:
+            return view(*args, **kwargs)
+        
+        key = request_key()
+        entry = response_cache.get(key, generation)
+        if entry is not None:
+            body, mimetype = entry
+            response = app.response_class(body, mimetype=mimetype)
+            response.headers['X-Cache'] = 'HIT'
+            return response
+        
+        response = app.make_response(view(*args, **kwargs))
+        if response.status_code == 200:
+            response_cache.put(key, generation, (response.get_data(), response.mimetype))
+        response.headers['X-Cache'] = 'MISS'
+        return response
+    return wrapper
+
+# 每次导入后预先渲染的请求：各接口的默认参数和常用 limit
+PUBLISHED_LIMITS = (10, 20, 50, 100)
+PUBLISHED_REQUESTS = [('/', {}), ('/api/statistics', {}), ('/api/snapshot', {}), ('/api/bundle', {})]
+for path in ('/api/hot_news', '/api/today_hotspot', '/api/financial_calendar', '/api/community_posts'):
+    PUBLISHED_REQUESTS.append((path, {}))
+    PUBLISHED_REQUESTS += [(path, {'limit': str(limit)}) for limit in PUBLISHED_LIMITS]
+PUBLISHED_REQUESTS += [('/api/snapshot', {'category': category})
+                       for category in ('热点资讯', '公社热帖', '今日热点', '财经日历')]
+
+def render_published(key):
+    """通过应用自身渲染一个请求，返回响应体和 mimetype"""
+    path, args = key
+    with app.test_client() as client:
+        response = client.get(f"{path}?{urlencode(args)}" if args else path)
+    if response.status_code != 200:
+        return None
+    return response.get_data(), response.mimetype
+
+published_responses = PublishedResponses(
+    render_published,
+    [(path, tuple(sorted(args.items()))) for path, args in PUBLISHED_REQUESTS],
+    db_manager.get_generation
+)
+
+def list_params():
+    """列表接口的字段投影和响应格式参数：fields=title,heat&format=columnar"""
+    fields = request.args.get('fields')
+    fields = [field.strip() for field in fields.split(',') if field.strip()] if fields else None
+    fmt = request.args.get('format', 'rows')
+    if fmt not in ('rows', 'columnar'):
+        raise ValueError(f"不支持的响应格式: {fmt}，可选 rows 或 columnar")
+    return fields, fmt
+
+def to_columnar(rows, fields):
+    """按列组织数据：每个字段一个数组
+    
+    取值重复较多的字符串列（如 type）改为共享字典 strings 中的下标，
+    这些列记录在 encoded 中，客户端用 strings[下标] 还原。
+    """
+    strings = []
+    string_index = {}
+    columns = {}
+    encoded = []
+    for field in fields:
+        values = [row[field] for row in rows]
+        texts = [value for value in values if value is not None]
+        repeated = texts and all(isinstance(value, str) for value in texts) and len(set(texts)) * 2 <= len(texts)
+        if repeated:
+            for value in texts:
+                if value not in string_index:
+                    string_index[value] = len(strings)
+                    strings.append(value)
+            values = [None if value is None else string_index[value] for value in values]
+            encoded.append(field)
+        columns[field] = values
+    return {'fields': fields, 'columns': columns, 'encoded': encoded, 'strings': strings}
+
+def list_response(data, limit, fields=None, fmt='rows'):
+    """列表接口的统一响应：数据满一页时附带下一页的游标；按需投影字段或按列返回"""
+    next_cursor = encode_cursor(data[-1]) if data and len(data) >= limit else None
+    if fields:
+        # 游标需要的列总会查询，未请求时不返回
+        data = [{field: row[field] for field in fields} for row in data]
+    
+    if fmt == 'columnar':
+        fields = fields or (list(data[0]) if data else [])
+        return jsonify(dict({
+            'success': True,
+            'count': len(data),
+            'format': 'columnar',
+            'next_cursor': next_cursor
+        }, **to_columnar(data, fields)))
+    
+    return jsonify({
+        'success': True,
+        'count': len(data),
+        'data': data,
+        'next_cursor': next_cursor
+    })
+
+def bad_request(e):
+    return jsonify({
+        'success': False,
+        'error': str(e)
+    }), 400
 
 @app.route('/')
+@conditional()
 def index():
     """首页"""
     return jsonify({
@@ -24,26 +216,31 @@ def index():
             '/api/today_hotspot': '获取今日热点数据', 
             '/api/financial_calendar': '获取财经日历数据',
             '/api/community_posts': '获取公社热帖数据',
+            '/api/hottest': '获取时间窗口内热度最高的条目',
+            '/api/snapshot': '获取某个类别最新一次抓取的完整列表',
+            '/api/bundle': '一次获取全部或部分类别的最新数据及批次信息',
             '/api/statistics': '获取数据统计'
         }
     })
 
 @app.route('/api/hot_news')
+@conditional()
+@cached
 def get_hot_news():
     """获取热点资讯数据"""
     try:
         # 获取查询参数
         limit = request.args.get('limit', 50, type=int)
         news_type = request.args.get('type')
+        cursor = request.args.get('cursor')
+        fields, fmt = list_params()
         
-        data = db_manager.get_hot_news(limit, news_type)
+        data = db_manager.get_hot_news(limit, news_type, cursor, fields)
         
-        return jsonify({
-            'success': True,
-            'count': len(data),
-            'data': data
-        })
+        return list_response(data, limit, fields, fmt)
         
+    except ValueError as e:
+        return bad_request(e)
     except Exception as e:
         logging.error(f"获取热点资讯数据失败: {e}")
         return jsonify({
@@ -52,19 +249,21 @@ def get_hot_news():
         }), 500
 
 @app.route('/api/today_hotspot')
+@conditional()
+@cached
 def get_today_hotspot():
     """获取今日热点数据"""
     try:
         limit = request.args.get('limit', 20, type=int)
+        cursor = request.args.get('cursor')
+        fields, fmt = list_params()
         
-        data = db_manager.get_today_hotspot(limit)
+        data = db_manager.get_today_hotspot(limit, cursor, fields)
         
-        return jsonify({
-            'success': True,
-            'count': len(data),
-            'data': data
-        })
+        return list_response(data, limit, fields, fmt)
         
+    except ValueError as e:
+        return bad_request(e)
     except Exception as e:
         logging.error(f"获取今日热点数据失败: {e}")
         return jsonify({
@@ -73,20 +272,22 @@ def get_today_hotspot():
         }), 500
 
 @app.route('/api/financial_calendar')
+@conditional()
+@cached
 def get_financial_calendar():
     """获取财经日历数据"""
     try:
         limit = request.args.get('limit', 50, type=int)
         date_filter = request.args.get('date')
+        cursor = request.args.get('cursor')
+        fields, fmt = list_params()
         
-        data = db_manager.get_financial_calendar(limit, date_filter)
+        data = db_manager.get_financial_calendar(limit, date_filter, cursor, fields)
         
-        return jsonify({
-            'success': True,
-            'count': len(data),
-            'data': data
-        })
+        return list_response(data, limit, fields, fmt)
         
+    except ValueError as e:
+        return bad_request(e)
     except Exception as e:
         logging.error(f"获取财经日历数据失败: {e}")
         return jsonify({
@@ -95,12 +296,41 @@ def get_financial_calendar():
         }), 500
 
 @app.route('/api/community_posts')
+@conditional()
+@cached
 def get_community_posts():
     """获取公社热帖数据"""
     try:
         limit = request.args.get('limit', 50, type=int)
+        cursor = request.args.get('cursor')
+        fields, fmt = list_params()
         
-        data = db_manager.get_community_posts(limit)
+        data = db_manager.get_community_posts(limit, cursor, fields)
+        
+        return list_response(data, limit, fields, fmt)
+        
+    except ValueError as e:
+        return bad_request(e)
+    except Exception as e:
+        logging.error(f"获取公社热帖数据失败: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/hottest')
+@conditional(time_bucket=60)
+def get_hottest():
+    """获取时间窗口内热度最高的条目"""
+    try:
+        limit = request.args.get('limit', 10, type=int)
+        hours = request.args.get('hours', 24, type=float)
+        news_type = request.args.get('type')
+        source = request.args.get('source', 'hot_news')
+        since = request.args.get('since')
+        until = request.args.get('until')
+        
+        data = db_manager.get_hottest(limit, hours, news_type, source, since, until)
         
         return jsonify({
             'success': True,
@@ -108,22 +338,89 @@ def get_community_posts():
             'data': data
         })
         
+    except ValueError as e:
+        return bad_request(e)
     except Exception as e:
-        logging.error(f"获取公社热帖数据失败: {e}")
+        logging.error(f"获取热度排行失败: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/snapshot')
+@conditional()
+@cached
+def get_snapshot():
+    """获取某个类别最新一次抓取的完整列表"""
+    try:
+        category = request.args.get('category', '热点资讯')
+        
+        data = db_manager.get_snapshot(category)
+        run = db_manager.get_latest_run(category)
+        
+        return jsonify({
+            'success': True,
+            'category': category,
+            'run': run,
+            'count': len(data),
+            'data': data
+        })
+        
+    except ValueError as e:
+        return bad_request(e)
+    except Exception as e:
+        logging.error(f"获取最新快照失败: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/bundle')
+@conditional()
+@cached
+def get_bundle():
+    """一次获取全部或部分类别的最新数据及批次信息，前端只需请求一次"""
+    try:
+        categories = request.args.get('categories')
+        categories = [c.strip() for c in categories.split(',') if c.strip()] if categories else None
+        
+        bundle = db_manager.get_bundle(categories)
+        if bundle is None:
+            return jsonify({
+                'success': False,
+                'error': '获取数据包失败'
+            }), 500
+        
+        return jsonify({
+            'success': True,
+            'meta': bundle['meta'],
+            'data': bundle['data']
+        })
+        
+    except ValueError as e:
+        return bad_request(e)
+    except Exception as e:
+        logging.error(f"获取数据包失败: {e}")
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
 @app.route('/api/statistics')
+@conditional()
+@cached
 def get_statistics():
     """获取数据统计"""
     try:
+        days = request.args.get('days', 30, type=int)
+        
         stats = db_manager.get_data_statistics()
+        daily = db_manager.get_daily_statistics(days)
         
         return jsonify({
             'success': True,
-            'data': stats
+            'data': stats,
+            'daily': daily
         })
         
     except Exception as e:
@@ -134,11 +431,16 @@ def get_statistics():
         }), 500
 
 @app.route('/api/search')
+@conditional()
+@cached
 def search_data():
     """搜索数据"""
     try:
-        keyword = request.args.get('q', '')
+        keyword = request.args.get('q', '').strip()
         limit = request.args.get('limit', 20, type=int)
+        news_type = request.args.get('type')
+        date_from = request.args.get('date_from')
+        date_to = request.args.get('date_to')
         
         if not keyword:
             return jsonify({
@@ -146,12 +448,13 @@ def search_data():
                 'error': '请提供搜索关键词'
             }), 400
         
-        # 这里可以扩展搜索功能，目前简单返回提示
+        data = db_manager.search(keyword, limit, news_type, date_from, date_to)
+        
         return jsonify({
             'success': True,
-            'message': '搜索功能待实现',
             'keyword': keyword,
-            'limit': limit
+            'count': len(data),
+            'data': data
         })
         
     except Exception as e:
@@ -169,8 +472,12 @@ if __name__ == '__main__':
     print("  GET /api/today_hotspot      - 获取今日热点数据")
     print("  GET /api/financial_calendar - 获取财经日历数据")
     print("  GET /api/community_posts    - 获取公社热帖数据")
-    print("  GET /api/statistics         - 获取数据统计")
-    print("  GET /api/search             - 搜索数据")
+    print("  列表接口均支持 cursor 分页、fields=字段1,字段2 投影和 format=columnar 按列返回")
+    print("  GET /api/hottest            - 时间窗口内热度排行 (hours, type, source, limit)")
+    print("  GET /api/snapshot           - 某个类别最新一次抓取的完整列表 (category)")
+    print("  GET /api/bundle             - 全部或部分类别的最新数据及批次信息 (categories)")
+    print("  GET /api/statistics         - 获取数据统计 (days)")
+    print("  GET /api/search             - 全文搜索 (q, type, date_from, date_to, limit)")
     print("\n服务器运行在: http://127.0.0.1:5000")
     print("按 Ctrl+C 停止服务器")
     
@@ -0,0 +1,256 @@
+import asyncio
+import time
+import logging
+from urllib.parse import urlparse
+
+try:
+    import aiohttp
+except ImportError:  # 未安装aiohttp时退回到线程中执行requests
+    aiohttp = None
+    import requests
+
+# 配置日志
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+API_PATH = "/api/getHotNewsByType"
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'application/json, text/javascript, */*; q=0.01',
+    'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
+    'Content-Type': 'application/x-www-form-urlencoded; charset=UTF-8',
+    'X-Requested-With': 'XMLHttpRequest',
+}
+
+
+class TokenBucket:
+    """异步令牌桶：以 rate 个/秒的速度补充令牌，最多积累 capacity 个"""
+
+    def __init__(self, rate=2.0, capacity=4):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        """取走一个令牌，令牌不足时等待（可被取消）"""
+        async with self._lock:
+            self._refill()
+            while self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+
+class OriginRateLimiter:
+    """每个源站一个令牌桶，所有请求共享"""
+
+    def __init__(self, rate=2.0, capacity=4):
+        self.rate = rate
+        self.capacity = capacity
+        self.buckets = {}
+
+    def bucket_for(self, url):
+        parsed = urlparse(url)
+        origin = f"{parsed.scheme}://{parsed.netloc}"
+        if origin not in self.buckets:
+            self.buckets[origin] = TokenBucket(self.rate, self.capacity)
+        return self.buckets[origin]
+
+    async def acquire(self, url):
+        await self.bucket_for(url).acquire()
+
+
+class CrawlJob:
+    """一个抓取任务：对某个源站请求某个类别，并用给定的解析函数处理结果
+
+    parse 接收 (html_content, data)，data 为接口返回的完整JSON，
+    这样现有爬虫类的解析方法可以原样复用。
+    """
+
+    def __init__(self, name, news_type, parse, origin=None, deadline=None):
+        self.name = name
+        self.news_type = news_type
+        self.parse = parse
+        self.origin = origin
+        self.deadline = deadline
+
+
+def jobs_for_crawler(crawler, origins=None):
+    """为现有爬虫类生成抓取任务
+
+    每个爬虫类通过 api_parsers() 提供自己的 (类型, 类别名) -> 解析函数 对照表，子类可以覆盖。
+    """
+    origins = origins or [crawler.base_url]
+    parsers = crawler.api_parsers()
+
+    return [
+        CrawlJob(type_name, type_key, parse, origin=origin)
+        for origin in origins
+        for (type_key, type_name), parse in parsers.items()
+    ]
+
+
+class AsyncCrawlEngine:
+    """基于asyncio的抓取引擎
+
+    所有请求以协程方式发出，按源站共享令牌桶限速；
+    每个请求有独立的截止时间，cancel() 可协作式地取消所有未完成的请求。
+    """
+
+    def __init__(self, base_url="https://duanxianxia.com", rate=2.0, burst=4,
+                 request_timeout=15, max_concurrency=16):
+        self.base_url = base_url
+        self.request_timeout = request_timeout
+        self.limiter = OriginRateLimiter(rate, burst)
+        self.max_concurrency = max_concurrency
+        self._tasks = set()
+        self._cancelled = False
+
+    def headers_for(self, origin):
+        headers = dict(DEFAULT_HEADERS)
+        headers['Origin'] = origin
+        headers['Referer'] = f'{origin}/web/hotnews/web'
+        return headers
+
+    async def fetch_json(self, session, origin, news_type):
+        """向源站发出一次 getHotNewsByType 请求，返回JSON"""
+        url = f"{origin}{API_PATH}"
+        await self.limiter.acquire(url)
+        if self._cancelled:
+            raise asyncio.CancelledError()
+
+        if aiohttp is not None:
+            async with session.post(url, data={'type': news_type},
+                                    headers=self.headers_for(origin)) as response:
+                response.raise_for_status()
+                return await response.json(content_type=None)
+
+        def blocking_post():
+            response = requests.post(url, data={'type': news_type},
+                                     headers=self.headers_for(origin),
+                                     timeout=self.request_timeout)
+            response.raise_for_status()
+            return response.json()
+
+        return await asyncio.to_thread(blocking_post)
+
+    async def run_job(self, session, job, semaphore):
+        """执行单个任务，返回结果字典"""
+        origin = job.origin or self.base_url
+        deadline = job.deadline or self.request_timeout
+        started = time.monotonic()
+        result = {
+            'name': job.name,
+            'type': job.news_type,
+            'origin': origin,
+            'records': [],
+            'error': None,
+            'elapsed': 0.0
+        }
+
+        try:
+            async with semaphore:
+                data = await asyncio.wait_for(self.fetch_json(session, origin, job.news_type), deadline)
+            if data.get('result') == 'success':
+                html_content = data.get('html', '')
+                if html_content:
+                    result['records'] = job.parse(html_content, data)
+                else:
+                    logging.warning(f"{job.name} ({origin}) 返回空HTML内容")
+            else:
+                result['error'] = f"API返回失败: {data}"
+        except asyncio.TimeoutError:
+            result['error'] = f"超过截止时间 {deadline}s"
+        except asyncio.CancelledError:
+            result['error'] = "已取消"
+        except Exception as e:
+            result['error'] = str(e)
+
+        result['elapsed'] = time.monotonic() - started
+        if result['error']:
+            logging.error(f"获取 {job.name} ({origin}) 失败: {result['error']}")
+        else:
+            logging.info(f"获取到 {job.name} ({origin}) {len(result['records'])} 条数据")
+        return result
+
+    async def crawl(self, jobs):
+        """在同一事件循环中并发执行所有任务，按任务顺序返回结果"""
+        self._cancelled = False
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        if aiohttp is not None:
+            timeout = aiohttp.ClientTimeout(total=self.request_timeout)
+            session = aiohttp.ClientSession(timeout=timeout, trust_env=False)
+        else:
+            session = None
+
+        tasks = []
+        try:
+            tasks = [asyncio.ensure_future(self.run_job(session, job, semaphore)) for job in jobs]
+            self._tasks.update(tasks)
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            self._tasks.difference_update(tasks)
+            if session is not None:
+                await session.close()
+
+        final = []
+        for job, result in zip(jobs, results):
+            if isinstance(result, BaseException):
+                result = {
+                    'name': job.name,
+                    'type': job.news_type,
+                    'origin': job.origin or self.base_url,
+                    'records': [],
+                    'error': "已取消" if isinstance(result, asyncio.CancelledError) else str(result),
+                    'elapsed': 0.0
+                }
+            final.append(result)
+        return final
+
+    def cancel(self):
+        """协作式取消：正在等待的请求会尽快结束"""
+        self._cancelled = True
+        for task in list(self._tasks):
+            task.cancel()
+
+    def crawl_all(self, jobs):
+        """同步入口：运行所有任务并按类别名汇总记录"""
+        # 令牌桶绑定事件循环，每次新建事件循环时重建
+        self.limiter.buckets.clear()
+        results = asyncio.run(self.crawl(jobs))
+        all_results = {}
+        for result in results:
+            all_results.setdefault(result['name'], [])
+            if not all_results[result['name']]:
+                all_results[result['name']] = result['records']
+        return all_results
+
+
+def main():
+    """主函数"""
+    from hotspot_crawler import HotSpotCrawler
+
+    crawler = HotSpotCrawler()
+    engine = AsyncCrawlEngine(base_url=crawler.base_url)
+    jobs = jobs_for_crawler(crawler)
+
+    all_data = engine.crawl_all(jobs)
+    for category, items in all_data.items():
+        print(f"{category}: {len(items)}条")
+
+    crawler.save_to_file(all_data)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+解析器基准测试
+
+在 fixtures/ 中保存的 getHotNewsByType 接口响应上运行仓库里的每一种解析实现，
+另外把每个样本放大10倍和100倍模拟大页面。
+对每种实现统计耗时、每秒记录数和内存，并与同一爬虫类的 html.parser 后端输出对比，
+结果写入 benchmarks/ 目录下的JSON文件（不纳入版本库）便于多次运行对比。
+
+内存有两项：
+    peak_rss_kb / rss_growth_kb  每种实现在单独 fork 出的子进程中解析一次，用 resource.getrusage
+                                 读取子进程峰值RSS及解析造成的增长，包含 lxml/libxml2 在C层的分配。
+                                 RSS在计时之前测量，此时主进程还没有解析过页面，各子进程起点相同
+    python_heap_peak_kb          tracemalloc 统计的峰值，只包含Python堆上的分配
+不支持 resource 模块或 fork 的平台（Windows）上RSS两项为 null。
+
+用法: python benchmark_parsers.py [输出文件] [重复次数]
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import platform
+import tracemalloc
+import multiprocessing
+from datetime import datetime
+
+try:
+    import resource
+    RSS_AVAILABLE = 'fork' in multiprocessing.get_all_start_methods()
+except ImportError:
+    RSS_AVAILABLE = False
+
+import lxml_parser
+from hotspot_crawler import HotSpotCrawler
+from complete_hotspot_crawler import CompleteHotSpotCrawler
+from hotspot_crawler_advanced import AdvancedHotSpotCrawler
+from special_crawler import SpecialHotSpotCrawler
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURE_DIR = os.path.join(BASE_DIR, 'fixtures')
+OUTPUT_DIR = os.path.join(BASE_DIR, 'benchmarks')
+CATEGORIES = ['ths', 'jiuyan', 'chaosha', 'timeline']
+SCALES = [1, 10, 100]
+BACKENDS = ['html.parser', 'lxml', 'stream']
+
+
+def load_fixture(news_type):
+    """读取保存的接口响应"""
+    with open(os.path.join(FIXTURE_DIR, f'{news_type}.json'), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def inflate(html_content, scale):
+    """把页面内容重复 scale 次，条目/面板都是顶层兄弟元素，结构保持不变"""
+    return '\n'.join([html_content] * scale)
+
+
+def parser_entries(news_type):
+    """返回该类别下所有解析实现: (名称, 爬虫类, 后端, 调用函数)"""
+    entries = []
+    for backend in BACKENDS:
+        # 流式提取器只覆盖热点条目列表，其余类别会退回到lxml
+        if backend == 'stream' and news_type not in ['ths', 'jiuyan']:
+            continue
+        hotspot = HotSpotCrawler(parser_backend=backend)
+        entries.append((f'HotSpotCrawler[{backend}]', 'HotSpotCrawler', backend,
+                        lambda html, c=hotspot: c.parse_hot_news(html, news_type)))
+
+        complete = CompleteHotSpotCrawler(parser_backend=backend)
+        if news_type in ['ths', 'jiuyan']:
+            parse = lambda html, c=complete: c.parse_hot_news(html, news_type)
+        elif news_type == 'chaosha':
+            parse = lambda html, c=complete: c.parse_today_hotspot(html)
+        else:
+            parse = lambda html, c=complete: c.parse_calendar(html, '')
+        entries.append((f'CompleteHotSpotCrawler[{backend}]', 'CompleteHotSpotCrawler', backend, parse))
+
+        # 高级/特殊爬虫只有 lxml 和 html.parser 两种后端
+        if backend == 'stream':
+            continue
+        advanced = AdvancedHotSpotCrawler(parser_backend=backend)
+        special = SpecialHotSpotCrawler(parser_backend=backend)
+        if news_type in ['ths', 'jiuyan']:
+            entries.append((f'AdvancedHotSpotCrawler[{backend}]', 'AdvancedHotSpotCrawler', backend,
+                            lambda html, c=advanced: c.parse_hot_news(html, news_type)))
+        elif news_type == 'chaosha':
+            entries.append((f'SpecialHotSpotCrawler.parse_today_hotspot_from_html[{backend}]',
+                            'SpecialHotSpotCrawler', backend,
+                            lambda html, c=special: c.parse_today_hotspot_from_html(html)))
+        elif news_type == 'timeline':
+            entries.append((f'SpecialHotSpotCrawler[{backend}]', 'SpecialHotSpotCrawler', backend,
+                            lambda html, c=special: c.parse_calendar_from_html(html, '')))
+            entries.append((f'AdvancedHotSpotCrawler.parse_timeline_from_html[{backend}]',
+                            'AdvancedHotSpotCrawler', backend,
+                            lambda html, c=advanced: c.parse_timeline_from_html(html)))
+    return entries
+
+
+def strip_crawl_time(records):
+    return [{k: v for k, v in record.items() if k != 'crawl_time'} for record in records]
+
+
+def max_rss_kb():
+    """当前进程的峰值RSS（KB），macOS 上 ru_maxrss 的单位是字节"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 if sys.platform == 'darwin' else peak
+
+
+def rss_child(news_type, scale, name):
+    """在 fork 出的子进程中解析一次，返回 (峰值RSS, 解析造成的峰值增长)，单位KB"""
+    logging.disable(logging.WARNING)
+    html_content = inflate(load_fixture(news_type)['html'], scale)
+    parse = {entry[0]: entry[3] for entry in parser_entries(news_type)}[name]
+    before = max_rss_kb()
+    parse(html_content)
+    after = max_rss_kb()
+    return after, after - before
+
+
+def measure_rss():
+    """逐个实现测量峰值RSS，返回 {(类别, 倍数, 名称): (峰值RSS, 增长)}
+
+    spawn/exec 出的子进程会继承父进程的 ru_maxrss，读不到自己的峰值；
+    fork 出的子进程从父进程当前的RSS开始计，所以在解析任何页面之前测量。
+    """
+    rss = {}
+    with multiprocessing.get_context('fork').Pool(1, maxtasksperchild=1) as pool:
+        for news_type in CATEGORIES:
+            for scale in SCALES:
+                for entry in parser_entries(news_type):
+                    rss[(news_type, scale, entry[0])] = pool.apply(rss_child, (news_type, scale, entry[0]))
+    return rss
+
+
+def measure(parse, html_content, repeat):
+    """取多次运行中最快的一次耗时，Python堆峰值单独跑一次测量"""
+    timings = []
+    records = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        records = parse(html_content)
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    parse(html_content)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(timings), peak, records
+
+
+def result_entry(news_type, scale, html_content, name, records, seconds, peak, peak_rss, rss_growth, matches):
+    """整理一条结果并打印"""
+    mark = '➖' if matches is None else ('✅' if matches else '❌')
+    rss_text = f"{peak_rss:>9.0f}KB RSS(+{rss_growth:.0f})" if peak_rss is not None else ''
+    print(f"{mark} {news_type:<8} x{scale:<3} {name:<58} "
+          f"{len(records):>6}条 {seconds * 1000:>9.2f}ms {peak / 1024:>9.1f}KB堆 {rss_text}")
+    return {
+        'category': news_type,
+        'scale': scale,
+        'html_bytes': len(html_content.encode('utf-8')),
+        'parser': name,
+        'records': len(records),
+        'seconds': round(seconds, 6),
+        'records_per_sec': round(len(records) / seconds, 1) if seconds else None,
+        'peak_rss_kb': round(peak_rss, 1) if peak_rss is not None else None,
+        'rss_growth_kb': round(rss_growth, 1) if rss_growth is not None else None,
+        'python_heap_peak_kb': round(peak / 1024, 1),
+        'matches_html_parser': matches
+    }
+
+
+def run_benchmark(repeat=3):
+    """运行全部基准测试，返回结果字典"""
+    rss = measure_rss() if RSS_AVAILABLE else {}
+    results = []
+    for news_type in CATEGORIES:
+        fixture = load_fixture(news_type)
+        for scale in SCALES:
+            html_content = inflate(fixture['html'], scale)
+            references = {}
+            for name, crawler_name, backend, parse in parser_entries(news_type):
+                seconds, peak, records = measure(parse, html_content, repeat)
+                peak_rss, rss_growth = rss.get((news_type, scale, name), (None, None))
+                records = strip_crawl_time(records)
+                if backend == 'html.parser':
+                    references[crawler_name] = records
+                # 没有 html.parser 实现可对比时为 None
+                reference = references.get(crawler_name)
+                matches = records == reference if reference is not None else None
+                results.append(result_entry(news_type, scale, html_content, name, records,
+                                            seconds, peak, peak_rss, rss_growth, matches))
+
+    return {
+        'run_time': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'python': platform.python_version(),
+        'lxml_available': lxml_parser.LXML_AVAILABLE,
+        'repeat': repeat,
+        'rss_available': RSS_AVAILABLE,
+        'results': results
+    }
+
+
+def main():
+    """主函数"""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output = sys.argv[1] if len(sys.argv) > 1 else os.path.join(OUTPUT_DIR, f"benchmark_parsers_{timestamp}.json")
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    print("解析器基准测试")
+    print("=" * 50)
+
+    # 解析过程中的日志会干扰计时
+    logging.disable(logging.WARNING)
+    report = run_benchmark(repeat)
+    logging.disable(logging.NOTSET)
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已保存到: {output}")
+
+    return all(result['matches_html_parser'] is not False for result in report['results'])
+
+
+if __name__ == "__main__":
+    exit(0 if main() else 1)
@@ -6,6 +6,10 @@ import time
 from datetime import datetime
 import logging
 import csv
+from payload_hash import PayloadHashStore
+import lxml_parser
+import extraction_specs
+import stream_parser
 
 # 配置日志
 logging.basicConfig(
@@ -14,10 +18,19 @@ logging.basicConfig(
 )
 
 class CompleteHotSpotCrawler:
-    def __init__(self):
+    def __init__(self, hash_store=None, parser_backend=None, category_backends=None):
         self.base_url = "https://duanxianxia.com"
         self.session = requests.Session()
         self.setup_headers()
+        # 传入 PayloadHashStore 后，payload 未变化的类别返回 None 并跳过解析
+        self.hash_store = hash_store
+        self.unchanged_categories = []
+        # category_backends 可为单个类别指定解析后端，例如 {'ths': 'stream'}
+        self.parser_backend = lxml_parser.resolve_backend(parser_backend)
+        self.category_backends = {
+            news_type: lxml_parser.resolve_backend(backend)
+            for news_type, backend in (category_backends or {}).items()
+        }
         
     def setup_headers(self):
         """设置请求头"""
@@ -31,6 +44,16 @@ class CompleteHotSpotCrawler:
             'Referer': f'{self.base_url}/web/hotnews/web'
         })
     
+    def _payload_unchanged(self, category, html_content):
+        """payload与上次相同时记录无变化事件并返回True"""
+        if self.hash_store is None:
+            return False
+        if self.hash_store.is_unchanged(category, html_content):
+            self.hash_store.record_no_change(category)
+            return True
+        self.hash_store.stage(category, html_content)
+        return False
+    
     def get_hot_news(self, news_type='ths'):
         """获取热点资讯数据"""
         logging.info(f"尝试获取{news_type}热点资讯数据...")
@@ -47,6 +70,9 @@ class CompleteHotSpotCrawler:
             if data.get('result') == 'success':
                 html_content = data.get('html', '')
                 if html_content:
+                    category = '热点资讯' if news_type == 'ths' else '公社热帖'
+                    if self._payload_unchanged(category, html_content):
+                        return None
                     return self.parse_hot_news(html_content, news_type)
                 else:
                     logging.warning(f"{news_type}热点资讯返回空HTML内容")
@@ -59,8 +85,26 @@ class CompleteHotSpotCrawler:
             logging.error(f"获取{news_type}热点资讯失败: {str(e)}")
             return []
     
+    def api_parsers(self):
+        """getHotNewsByType 接口各类别的解析函数：(类型, 类别名) -> parse(html_content, data)"""
+        return {
+            ('ths', '热点资讯'): lambda html, data: self.parse_hot_news(html, 'ths'),
+            ('jiuyan', '公社热帖'): lambda html, data: self.parse_hot_news(html, 'jiuyan'),
+            ('chaosha', '今日热点'): lambda html, data: self.parse_today_hotspot(html),
+            ('timeline', '财经日历'): lambda html, data: self.parse_calendar(html, data.get('cdate', '')),
+        }
+    
     def parse_hot_news(self, html_content, news_type):
         """解析热点资讯HTML内容"""
+        backend = self.category_backends.get(news_type, self.parser_backend)
+        if backend in ['lxml', 'stream']:
+            if backend == 'stream':
+                # 流式提取，不构建文档树
+                rows = extraction_specs.finish_rows('hot_items', stream_parser.iter_hot_items(html_content))
+            else:
+                rows = extraction_specs.extract('hot_items', html_content)
+            return extraction_specs.tag_records(rows, extraction_specs.HOT_ITEM_TYPES[news_type])
+        
         soup = BeautifulSoup(html_content, 'html.parser')
         results = []
         
@@ -121,6 +165,8 @@ class CompleteHotSpotCrawler:
             if data.get('result') == 'success':
                 html_content = data.get('html', '')
                 if html_content:
+                    if self._payload_unchanged('今日热点', html_content):
+                        return None
                     return self.parse_today_hotspot(html_content)
                 else:
                     logging.warning("今日热点返回空HTML内容")
@@ -135,6 +181,17 @@ class CompleteHotSpotCrawler:
     
     def parse_today_hotspot(self, html_content):
         """解析今日热点内容"""
+        if self.category_backends.get('chaosha', self.parser_backend) != 'html.parser' \
+                and lxml_parser.LXML_AVAILABLE:
+            return [{
+                'date': block['date'],
+                'keywords': block['keywords'],
+                'heat': block['heat'],
+                'title': block['title'],
+                'type': '今日热点',
+                'crawl_time': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            } for block in extraction_specs.extract('today_hotspot', html_content)]
+        
         soup = BeautifulSoup(html_content, 'html.parser')
         results = []
         
@@ -206,6 +263,8 @@ class CompleteHotSpotCrawler:
                 cdate = data.get('cdate', '')
                 
                 if html_content:
+                    if self._payload_unchanged('财经日历', html_content):
+                        return None
                     return self.parse_calendar(html_content, cdate)
                 else:
                     logging.warning("财经日历返回空HTML内容")
@@ -220,6 +279,15 @@ class CompleteHotSpotCrawler:
     
     def parse_calendar(self, html_content, cdate):
         """解析财经日历内容"""
+        if self.category_backends.get('timeline', self.parser_backend) != 'html.parser' \
+                and lxml_parser.LXML_AVAILABLE:
+            return [{
+                'date': event['date'],
+                'event': event['event'],
+                'type': '财经日历',
+                'crawl_time': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            } for event in extraction_specs.extract('calendar', html_content)]
+        
         soup = BeautifulSoup(html_content, 'html.parser')
         results = []
         
@@ -256,7 +324,7 @@ class CompleteHotSpotCrawler:
         return results
     
     def get_all_data(self):
-        """获取所有类型的数据"""
+        """获取所有类型的数据（payload未变化的类别不出现在结果中）"""
         results = {
             '热点资讯': self.get_hot_news('ths'),
             '公社热帖': self.get_hot_news('jiuyan'),
@@ -264,7 +332,8 @@ class CompleteHotSpotCrawler:
             '财经日历': self.get_financial_calendar()
         }
         
-        return results
+        self.unchanged_categories = [category for category, items in results.items() if items is None]
+        return {category: items for category, items in results.items() if items is not None}
     
     def save_to_json(self, data, filename=None):
         """保存数据到JSON文件"""
@@ -324,12 +393,22 @@ def main():
     print("支持抓取: 热点资讯、公社热帖、今日热点、财经日历")
     print("=" * 50)
     
-    crawler = CompleteHotSpotCrawler()
+    hash_store = PayloadHashStore()
+    crawler = CompleteHotSpotCrawler(hash_store=hash_store)
     
     # 获取所有数据
     print("开始抓取数据...")
     all_data = crawler.get_all_data()
     
+    if crawler.unchanged_categories:
+        print(f"数据无变化: {', '.join(crawler.unchanged_categories)}")
+    
+    if not all_data:
+        # 所有类别都没有变化，跳过文件输出和数据库导入
+        hash_store.save()
+        print("所有类别数据均无变化，跳过保存")
+        return
+    
     # 打印统计信息
     total_count = 0
     for category, items in all_data.items():
@@ -343,6 +422,10 @@ def main():
     json_file = crawler.save_to_json(all_data)
     csv_file = crawler.save_to_csv(all_data)
     
+    if json_file:
+        # 哈希在数据导入数据库成功后才提交（见 scheduled_crawler.py），导入失败时下次运行会重新处理
+        hash_store.stage_output(json_file)
+    
     if json_file and csv_file:
         print(f"\n数据已保存到:")
         print(f"JSON文件: {json_file}")
@@ -1,7 +1,15 @@
+import re
+import html
 import sqlite3
 import json
-from datetime import datetime
+import base64
+import sys
+import glob
+import os
+import time
+from datetime import datetime, timedelta
 import logging
+from db_pool import SQLitePool
 
 # 配置日志
 logging.basicConfig(
@@ -9,177 +17,845 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
+# 抓取结果中的类别 -> 存储的表
+CATEGORY_TABLES = {
+    '热点资讯': 'hot_news',
+    '公社热帖': 'hot_news',
+    '今日热点': 'today_hotspot',
+    '财经日历': 'financial_calendar'
+}
+
+# 各表的自然键：同一条内容重复抓取时更新已有行，而不是新增一行
+NATURAL_KEYS = {
+    'hot_news': ('type', 'title', 'link'),
+    'today_hotspot': ('date', 'title'),
+    'financial_calendar': ('date', 'event')
+}
+
+# 再次抓取到的行只更新内容和 last_seen（本地时间），created_at 保持首次写入时的值
+INSERT_SQL = {
+    'hot_news': '''
+        INSERT INTO hot_news (rank, title, link, publish_time, heat, heat_value, type, crawl_time, first_seen, last_seen,
+                              run_id, position)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(type, title, link) DO UPDATE SET
+            rank = excluded.rank,
+            publish_time = excluded.publish_time,
+            heat = excluded.heat,
+            heat_value = excluded.heat_value,
+            crawl_time = excluded.crawl_time,
+            last_seen = excluded.last_seen,
+            run_id = coalesce(excluded.run_id, run_id),
+            position = coalesce(excluded.position, position)
+    ''',
+    'today_hotspot': '''
+        INSERT INTO today_hotspot (date, title, keywords, heat, heat_value, type, crawl_time, first_seen, last_seen,
+                                   run_id, position)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(date, title) DO UPDATE SET
+            keywords = excluded.keywords,
+            heat = excluded.heat,
+            heat_value = excluded.heat_value,
+            crawl_time = excluded.crawl_time,
+            last_seen = excluded.last_seen,
+            run_id = coalesce(excluded.run_id, run_id),
+            position = coalesce(excluded.position, position)
+    ''',
+    'financial_calendar': '''
+        INSERT INTO financial_calendar (date, event, type, crawl_time, first_seen, last_seen, run_id, position)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(date, event) DO UPDATE SET
+            crawl_time = excluded.crawl_time,
+            last_seen = excluded.last_seen,
+            run_id = coalesce(excluded.run_id, run_id),
+            position = coalesce(excluded.position, position)
+    '''
+}
+
+
+HEAT_PATTERN = re.compile(r'(\d+(?:\.\d+)?)\s*([万亿]?)')
+HEAT_UNITS = {'万': 10000, '亿': 100000000}
+
+
+def parse_heat(text):
+    """把热度文本解析成整数：支持"热度："/"热度值："前缀、千分位和万/亿单位，无法解析时返回 None"""
+    if text is None:
+        return None
+    if isinstance(text, (int, float)):
+        return int(text)
+    match = HEAT_PATTERN.search(str(text).replace(',', ''))
+    if not match:
+        return None
+    value = float(match.group(1)) * HEAT_UNITS.get(match.group(2), 1)
+    return int(round(value))
+
+
+# 连续的汉字（含扩展A区和兼容汉字）
+CJK_RUN = re.compile(r'[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+')
+
+
+def cjk_bigrams(text):
+    """把连续汉字拆成重叠的双字词并用空格分隔，其他文本原样保留，供 unicode61 分词建立双字索引"""
+    if not text:
+        return ''
+    def split(match):
+        run = match.group()
+        return ' ' + ' '.join(run[i:i + 2] for i in range(max(1, len(run) - 1))) + ' '
+    return CJK_RUN.sub(split, text)
+
+
+# 在SQL（迁移回填和全文索引触发器）中调用的Python函数，每个连接打开时注册
+SQL_FUNCTIONS = {
+    'parse_heat': (1, parse_heat),
+    'cjk_bigrams': (1, cjk_bigrams),
+}
+
+
+def _seen_time(item):
+    return item.get('crawl_time') or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+# HotSpotCrawler 把今日热点和财经日历也写成热点条目的格式：日期在 publish_time，事件在 title
+def _item_date(item):
+    return item.get('date') or item.get('publish_time') or ''
+
+
+def _item_event(item):
+    return item.get('event') or item.get('title') or ''
+
+
+# 各表自然键中的内容列；为空的记录不写入，否则不同的记录会合并成一行
+ROW_CONTENT = {
+    'hot_news': lambda item: item.get('title') or '',
+    'today_hotspot': lambda item: item.get('title') or '',
+    'financial_calendar': _item_event
+}
+
+
+# 把一条抓取记录转成 INSERT_SQL 对应的参数；自然键列不能为 NULL，否则唯一约束不生效
+ROW_PARAMS = {
+    'hot_news': lambda item: (
+        item.get('rank', ''),
+        item.get('title', ''),
+        item.get('link') or '',
+        item.get('publish_time', ''),
+        item.get('heat', ''),
+        parse_heat(item.get('heat')),
+        item.get('type', ''),
+        item.get('crawl_time', ''),
+        _seen_time(item),
+        _seen_time(item)
+    ),
+    'today_hotspot': lambda item: (
+        _item_date(item),
+        item.get('title', ''),
+        item.get('keywords', ''),
+        item.get('heat', ''),
+        parse_heat(item.get('heat')),
+        item.get('type', ''),
+        item.get('crawl_time', ''),
+        _seen_time(item),
+        _seen_time(item)
+    ),
+    'financial_calendar': lambda item: (
+        _item_date(item),
+        _item_event(item),
+        item.get('type', ''),
+        item.get('crawl_time', ''),
+        _seen_time(item),
+        _seen_time(item)
+    )
+}
+
+
+def _dedup_statements(table, keys):
+    """合并自然键相同的历史行：保留最新的一行，并补上首次/最近出现时间，然后加唯一索引"""
+    key_list = ', '.join(keys)
+    return [
+        f"ALTER TABLE {table} ADD COLUMN first_seen TEXT",
+        f"ALTER TABLE {table} ADD COLUMN last_seen TEXT",
+        *[f"UPDATE {table} SET {key} = '' WHERE {key} IS NULL" for key in keys],
+        "DROP TABLE IF EXISTS temp.dedup_keep",
+        "CREATE TEMP TABLE dedup_keep (id INTEGER PRIMARY KEY, first_seen TEXT, last_seen TEXT)",
+        f"""INSERT INTO dedup_keep (id, first_seen, last_seen)
+            SELECT MAX(id), MIN(crawl_time), MAX(crawl_time) FROM {table} GROUP BY {key_list}""",
+        f"DELETE FROM {table} WHERE id NOT IN (SELECT id FROM dedup_keep)",
+        f"""UPDATE {table} SET
+                first_seen = (SELECT first_seen FROM dedup_keep WHERE dedup_keep.id = {table}.id),
+                last_seen = (SELECT last_seen FROM dedup_keep WHERE dedup_keep.id = {table}.id)""",
+        "DROP TABLE temp.dedup_keep",
+        f"CREATE UNIQUE INDEX IF NOT EXISTS ux_{table}_natural_key ON {table} ({key_list})"
+    ]
+
+
+def _category_filter(category):
+    """某个类别在其数据表中的行条件：热点资讯和公社热帖同在 hot_news 表，以类型区分"""
+    if CATEGORY_TABLES[category] != 'hot_news':
+        return '1'
+    return "type = '公社热帖'" if category == '公社热帖' else "type <> '公社热帖'"
+
+
+def _backfill_run_statements():
+    """把已有数据中各类别最近一次抓取的行归入一个迁移批次，并设为各类别的最新批次
+
+    最近一次抓取取 last_seen 距该类别最大值一分钟以内的行（同一次抓取的记录时间可能相差一两秒，
+    两次抓取至少间隔数分钟），批次内的顺序沿用写入顺序（id）。没有数据时不创建批次。
+    """
+    run_id = "(SELECT MAX(id) FROM crawl_runs)"
+    counts = ' UNION ALL '.join(
+        f"SELECT '{category}' AS category, COUNT(*) AS n FROM {table} "
+        f"WHERE run_id = crawl_runs.id AND {_category_filter(category)}"
+        for category, table in CATEGORY_TABLES.items()
+    )
+    return [
+        "DROP TABLE IF EXISTS temp.backfill_latest",
+        "CREATE TEMP TABLE backfill_latest (category TEXT PRIMARY KEY, crawl_time TEXT NOT NULL)",
+        *[f'''INSERT INTO backfill_latest (category, crawl_time)
+              SELECT '{category}', latest FROM (
+                  SELECT MAX(last_seen) AS latest FROM {table} WHERE {_category_filter(category)}
+              ) WHERE latest IS NOT NULL'''
+          for category, table in CATEGORY_TABLES.items()],
+        '''INSERT INTO crawl_runs (started_at, finished_at, imported_at, status, source)
+           SELECT first_time, last_time, datetime('now', 'localtime'), 'complete', 'migration' FROM (
+               SELECT MIN(crawl_time) AS first_time, MAX(crawl_time) AS last_time FROM backfill_latest
+           ) WHERE last_time IS NOT NULL''',
+        *[f'''UPDATE {table} SET run_id = {run_id}
+              WHERE {_category_filter(category)} AND last_seen >= (
+                  SELECT datetime(crawl_time, '-1 minute') FROM backfill_latest WHERE category = '{category}'
+              )'''
+          for category, table in CATEGORY_TABLES.items()],
+        *[f'''UPDATE {table} SET position = (
+                  SELECT COUNT(*) FROM {table} AS earlier WHERE earlier.run_id = {table}.run_id AND earlier.id < {table}.id
+              ) WHERE run_id IS NOT NULL'''
+          for table in NATURAL_KEYS],
+        f'''UPDATE crawl_runs SET counts = (
+               SELECT '{{' || group_concat('"' || category || '":' || n, ',') || '}}'
+               FROM ({counts}) WHERE n > 0
+           ) WHERE source = 'migration'
+        ''',
+        f"INSERT INTO latest_runs (category, run_id) SELECT category, {run_id} FROM backfill_latest",
+        "DROP TABLE temp.backfill_latest",
+    ]
+
+
+# 读取接口使用的查询，索引按这些访问路径设计（见 test_query_plans.py）
+QUERY_SQL = {
+    # 列表按 id 倒序（最新写入的在前），游标为上一页最后一行的 id；id 不会变化，翻页期间被再次抓取的行不会跳过
+    'hot_news': 'SELECT * FROM hot_news ORDER BY id DESC LIMIT ?',
+    'hot_news_after': 'SELECT * FROM hot_news WHERE id < ? ORDER BY id DESC LIMIT ?',
+    'hot_news_by_type': 'SELECT * FROM hot_news WHERE type = ? ORDER BY id DESC LIMIT ?',
+    'hot_news_by_type_after': 'SELECT * FROM hot_news WHERE type = ? AND id < ? ORDER BY id DESC LIMIT ?',
+    'today_hotspot': 'SELECT * FROM today_hotspot ORDER BY id DESC LIMIT ?',
+    'today_hotspot_after': 'SELECT * FROM today_hotspot WHERE id < ? ORDER BY id DESC LIMIT ?',
+    'financial_calendar': 'SELECT * FROM financial_calendar ORDER BY id DESC LIMIT ?',
+    'financial_calendar_after': 'SELECT * FROM financial_calendar WHERE id < ? ORDER BY id DESC LIMIT ?',
+    'financial_calendar_by_date': 'SELECT * FROM financial_calendar WHERE date = ? ORDER BY id DESC LIMIT ?',
+    'financial_calendar_by_date_after': '''
+        SELECT * FROM financial_calendar WHERE date = ? AND id < ? ORDER BY id DESC LIMIT ?
+    ''',
+    'statistics_by_day': '''
+        SELECT day, source, count FROM stats_daily WHERE day >= ? ORDER BY day DESC, source DESC
+    ''',
+    # 最新批次快照：按批次号定位，按抓取时的顺序返回
+    'hot_news_snapshot': '''
+        SELECT * FROM hot_news WHERE run_id = ? AND (type = '公社热帖') = ? ORDER BY position
+    ''',
+    'today_hotspot_snapshot': 'SELECT * FROM today_hotspot WHERE run_id = ? ORDER BY position',
+    'financial_calendar_snapshot': 'SELECT * FROM financial_calendar WHERE run_id = ? ORDER BY position',
+    # 时间窗口内最热：按 last_seen 索引定位窗口，再对窗口内的行取前N
+    'hot_news_hottest': '''
+        SELECT * FROM hot_news WHERE last_seen >= ? AND last_seen <= ?
+        ORDER BY heat_value DESC, id DESC LIMIT ?
+    ''',
+    'hot_news_hottest_by_type': '''
+        SELECT * FROM hot_news WHERE type = ? AND last_seen >= ? AND last_seen <= ?
+        ORDER BY heat_value DESC, id DESC LIMIT ?
+    ''',
+    'today_hotspot_hottest': '''
+        SELECT * FROM today_hotspot WHERE last_seen >= ? AND last_seen <= ?
+        ORDER BY heat_value DESC, id DESC LIMIT ?
+    '''
+}
+
+
+# 列表接口可以投影的列（fields= 参数）
+TABLE_COLUMNS = {
+    'hot_news': ('id', 'rank', 'title', 'link', 'publish_time', 'heat', 'heat_value', 'type', 'crawl_time',
+                 'created_at', 'first_seen', 'last_seen', 'run_id', 'position'),
+    'today_hotspot': ('id', 'date', 'title', 'keywords', 'heat', 'heat_value', 'type', 'crawl_time',
+                      'created_at', 'first_seen', 'last_seen', 'run_id', 'position'),
+    'financial_calendar': ('id', 'date', 'event', 'type', 'crawl_time', 'created_at', 'first_seen', 'last_seen',
+                           'run_id', 'position')
+}
+
+# 分页游标需要的列，投影时总是查询
+CURSOR_COLUMNS = ('id',)
+
+
+def select_columns(table, fields):
+    """把 fields 转换为查询的列清单，未指定时为 *；有未知字段时抛出 ValueError"""
+    if not fields:
+        return '*'
+    unknown = [field for field in fields if field not in TABLE_COLUMNS[table]]
+    if unknown:
+        raise ValueError(f"未知字段: {', '.join(unknown)}，可选字段: {', '.join(TABLE_COLUMNS[table])}")
+    columns = list(dict.fromkeys(list(fields) + list(CURSOR_COLUMNS)))
+    return ', '.join(columns)
+
+
+def encode_cursor(row):
+    """把一页最后一行的 id 编码成不透明的游标"""
+    raw = json.dumps([row['id']], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """解析游标，格式不对时抛出 ValueError"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except Exception:
+        raise ValueError(f"无效的分页游标: {cursor}")
+    # 旧格式的游标为 [created_at, id]，同样只取 id
+    if not isinstance(values, list) or not values or isinstance(values[-1], bool) or not isinstance(values[-1], int):
+        raise ValueError(f"无效的分页游标: {cursor}")
+    return values[-1]
+
+
+# 全文索引的来源表：表名 -> (rowid偏移, 标题列, 正文列, 日期表达式)
+# 索引的 rowid 为 源id*4+偏移，更新和删除时可以直接按 rowid 定位
+SEARCH_SOURCES = {
+    'hot_news': (1, 'title', "''", "substr(coalesce(nullif({row}.publish_time, ''), {row}.crawl_time), 1, 10)"),
+    'today_hotspot': (2, 'title', 'keywords', '{row}.date'),
+    'financial_calendar': (3, 'event', "''", '{row}.date'),
+}
+
+# 触发更新全文索引的列
+SEARCH_WATCHED_COLUMNS = {
+    'hot_news': ('title', 'publish_time'),
+    'today_hotspot': ('title', 'keywords', 'date'),
+    'financial_calendar': ('event', 'date'),
+}
+
+
+def _search_index_statements():
+    """全文索引表、增量维护触发器以及已有数据的回填"""
+    statements = [
+        """CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+               title, body, source UNINDEXED, source_id UNINDEXED, type UNINDEXED, date UNINDEXED,
+               tokenize = 'trigram'
+           )"""
+    ]
+    for table, (offset, title, body, date) in SEARCH_SOURCES.items():
+        def values(row):
+            body_expr = body if body.startswith("'") else f"{row}.{body}"
+            return (f"{row}.id * 4 + {offset}, {row}.{title}, {body_expr}, '{table}', {row}.id, "
+                    f"{row}.type, {date.format(row=row)}")
+
+        columns = 'rowid, title, body, source, source_id, type, date'
+        changed = ' OR '.join(f"old.{column} IS NOT new.{column}" for column in SEARCH_WATCHED_COLUMNS[table])
+        statements += [
+            f"""CREATE TRIGGER IF NOT EXISTS {table}_search_insert AFTER INSERT ON {table} BEGIN
+                    INSERT INTO search_index ({columns}) VALUES ({values('new')});
+                END""",
+            f"""CREATE TRIGGER IF NOT EXISTS {table}_search_update AFTER UPDATE ON {table}
+                WHEN {changed} BEGIN
+                    DELETE FROM search_index WHERE rowid = old.id * 4 + {offset};
+                    INSERT INTO search_index ({columns}) VALUES ({values('new')});
+                END""",
+            f"""CREATE TRIGGER IF NOT EXISTS {table}_search_delete AFTER DELETE ON {table} BEGIN
+                    DELETE FROM search_index WHERE rowid = old.id * 4 + {offset};
+                END""",
+            f"INSERT INTO search_index ({columns}) SELECT {values(table)} FROM {table}",
+        ]
+    return statements
+
+
+def _bigram_index_statements():
+    """双字全文索引：trigram 分词匹配不了2个字的词，对双字词另建一个 unicode61 索引
+
+    rowid 与 search_index 相同，内容为 cjk_bigrams 处理后的标题和正文，由触发器增量维护。
+    """
+    statements = [
+        """CREATE VIRTUAL TABLE IF NOT EXISTS search_bigrams USING fts5(
+               title, body, tokenize = 'unicode61'
+           )"""
+    ]
+    for table, (offset, title, body, date) in SEARCH_SOURCES.items():
+        def values(row):
+            body_expr = body if body.startswith("'") else f"cjk_bigrams({row}.{body})"
+            return f"{row}.id * 4 + {offset}, cjk_bigrams({row}.{title}), {body_expr}"
+
+        changed = ' OR '.join(f"old.{column} IS NOT new.{column}" for column in SEARCH_WATCHED_COLUMNS[table])
+        statements += [
+            f"""CREATE TRIGGER IF NOT EXISTS {table}_bigram_insert AFTER INSERT ON {table} BEGIN
+                    INSERT INTO search_bigrams (rowid, title, body) VALUES ({values('new')});
+                END""",
+            f"""CREATE TRIGGER IF NOT EXISTS {table}_bigram_update AFTER UPDATE ON {table}
+                WHEN {changed} BEGIN
+                    DELETE FROM search_bigrams WHERE rowid = old.id * 4 + {offset};
+                    INSERT INTO search_bigrams (rowid, title, body) VALUES ({values('new')});
+                END""",
+            f"""CREATE TRIGGER IF NOT EXISTS {table}_bigram_delete AFTER DELETE ON {table} BEGIN
+                    DELETE FROM search_bigrams WHERE rowid = old.id * 4 + {offset};
+                END""",
+        ]
+    statements.append(
+        'INSERT INTO search_bigrams (rowid, title, body) '
+        'SELECT rowid, cjk_bigrams(title), cjk_bigrams(body) FROM search_index'
+    )
+    return statements
+
+
+def _counter_statements():
+    """统计计数表、增量维护触发器以及已有数据的回填
+    
+    stats_totals 按来源（各表的 type 列）计数，stats_daily 按首次抓取日期和来源计数，
+    统计接口直接读取计数表，不再扫描数据表。
+    """
+    statements = [
+        '''CREATE TABLE IF NOT EXISTS stats_totals (
+               source TEXT PRIMARY KEY,
+               count INTEGER NOT NULL
+           ) WITHOUT ROWID''',
+        '''CREATE TABLE IF NOT EXISTS stats_daily (
+               day TEXT NOT NULL,
+               source TEXT NOT NULL,
+               count INTEGER NOT NULL,
+               PRIMARY KEY (day, source)
+           ) WITHOUT ROWID''',
+    ]
+    for table in NATURAL_KEYS:
+        def add(row):
+            return f"""
+                    INSERT INTO stats_totals (source, count) VALUES (coalesce({row}.type, ''), 1)
+                    ON CONFLICT(source) DO UPDATE SET count = count + 1;
+                    INSERT INTO stats_daily (day, source, count)
+                    VALUES (coalesce(date({row}.first_seen), ''), coalesce({row}.type, ''), 1)
+                    ON CONFLICT(day, source) DO UPDATE SET count = count + 1;"""
+
+        def remove(row):
+            return f"""
+                    UPDATE stats_totals SET count = count - 1 WHERE source = coalesce({row}.type, '');
+                    UPDATE stats_daily SET count = count - 1
+                    WHERE day = coalesce(date({row}.first_seen), '') AND source = coalesce({row}.type, '');
+                    DELETE FROM stats_totals WHERE source = coalesce({row}.type, '') AND count <= 0;
+                    DELETE FROM stats_daily
+                    WHERE day = coalesce(date({row}.first_seen), '') AND source = coalesce({row}.type, '')
+                      AND count <= 0;"""
+
+        statements += [
+            f"""CREATE TRIGGER IF NOT EXISTS {table}_stats_insert AFTER INSERT ON {table} BEGIN{add('new')}
+                END""",
+            f"""CREATE TRIGGER IF NOT EXISTS {table}_stats_update AFTER UPDATE OF type, first_seen ON {table}
+                WHEN old.type IS NOT new.type OR date(old.first_seen) IS NOT date(new.first_seen)
+                BEGIN{remove('old')}{add('new')}
+                END""",
+            f"""CREATE TRIGGER IF NOT EXISTS {table}_stats_delete AFTER DELETE ON {table} BEGIN{remove('old')}
+                END""",
+        ]
+    statements += [
+        f'''INSERT INTO stats_totals (source, count)
+            SELECT source, SUM(count) FROM (
+                {' UNION ALL '.join(f"SELECT coalesce(type, '') AS source, COUNT(*) AS count FROM {table} GROUP BY 1"
+                                    for table in NATURAL_KEYS)}
+            ) GROUP BY source''',
+        f'''INSERT INTO stats_daily (day, source, count)
+            SELECT day, source, SUM(count) FROM (
+                {' UNION ALL '.join(f"SELECT coalesce(date(first_seen), '') AS day, coalesce(type, '') AS source, "
+                                    f"COUNT(*) AS count FROM {table} GROUP BY 1, 2" for table in NATURAL_KEYS)}
+            ) GROUP BY day, source''',
+    ]
+    return statements
+
+
+def _like_pattern(term):
+    """LIKE 模式，转义通配符"""
+    escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f"%{escaped}%"
+
+
+# 高亮标记先用控制字符占位，HTML转义之后再换成 <mark>
+MARK_OPEN = '\x02'
+MARK_CLOSE = '\x03'
+
+
+def _mark_terms(text, terms):
+    """在原文中用占位符标出关键词（snippet() 只标出 trigram 匹配的长关键词）"""
+    for term in terms:
+        text = text.replace(term, f"{MARK_OPEN}{term}{MARK_CLOSE}")
+    return text
+
+
+def _highlight(text, open_mark='<mark>', close_mark='</mark>'):
+    """HTML转义后把占位符换成高亮标签，标题和正文中的 < > & 不会被当成HTML"""
+    return html.escape(text, quote=False).replace(MARK_OPEN, open_mark).replace(MARK_CLOSE, close_mark)
+
+
+def _bigram_phrase(term):
+    """2个字符的关键词在 search_bigrams 上的 MATCH 表达式
+
+    两个汉字匹配同一个双字词；字母数字（如 AI、5G）按词前缀匹配；
+    汉字和其他字符混合（如 A股）在双字索引中会被拆开，返回 None，由调用方改用 LIKE。
+    """
+    if CJK_RUN.fullmatch(term):
+        return f'"{term}"'
+    if term.isalnum() and not CJK_RUN.search(term):
+        return f'"{term}"*'
+    return None
+
+
+# 版本化的结构迁移：(版本号, 说明, SQL语句列表)，按 PRAGMA user_version 依次在事务中执行
+MIGRATIONS = [
+    (1, '按自然键去重，记录首次/最近出现时间',
+     [statement for table, keys in NATURAL_KEYS.items() for statement in _dedup_statements(table, keys)]),
+    (2, '为按类型、按日期的列表查询添加复合索引（按 id 分页）', [
+        'CREATE INDEX IF NOT EXISTS ix_hot_news_type_id ON hot_news (type, id)',
+        'CREATE INDEX IF NOT EXISTS ix_financial_calendar_date_id ON financial_calendar (date, id)',
+    ]),
+    (3, '建立FTS5全文索引（trigram分词）并用触发器增量维护', _search_index_statements()),
+    (4, '热度解析为整数列并回填，添加时间窗口热度查询索引', [
+        'ALTER TABLE hot_news ADD COLUMN heat_value INTEGER',
+        'ALTER TABLE today_hotspot ADD COLUMN heat_value INTEGER',
+        'UPDATE hot_news SET heat_value = parse_heat(heat)',
+        'UPDATE today_hotspot SET heat_value = parse_heat(heat)',
+        'CREATE INDEX IF NOT EXISTS ix_hot_news_last_seen ON hot_news (last_seen)',
+        'CREATE INDEX IF NOT EXISTS ix_hot_news_type_last_seen ON hot_news (type, last_seen)',
+        'CREATE INDEX IF NOT EXISTS ix_today_hotspot_last_seen ON today_hotspot (last_seen)',
+    ]),
+    (5, '添加抓取批次表，数据行关联批次，记录各类别最新批次，已有数据中最近一次抓取的行归入迁移批次', [
+        '''CREATE TABLE IF NOT EXISTS crawl_runs (
+               id INTEGER PRIMARY KEY AUTOINCREMENT,
+               started_at TEXT,
+               finished_at TEXT,
+               imported_at TEXT NOT NULL,
+               status TEXT NOT NULL,
+               counts TEXT,
+               source TEXT,
+               error TEXT
+           )''',
+        '''CREATE TABLE IF NOT EXISTS latest_runs (
+               category TEXT PRIMARY KEY,
+               run_id INTEGER NOT NULL REFERENCES crawl_runs(id)
+           )''',
+        *[statement for table in NATURAL_KEYS for statement in (
+            f'ALTER TABLE {table} ADD COLUMN run_id INTEGER REFERENCES crawl_runs(id)',
+            f'ALTER TABLE {table} ADD COLUMN position INTEGER',
+        )],
+        'CREATE INDEX IF NOT EXISTS ix_hot_news_run ON hot_news (run_id, position)',
+        'CREATE INDEX IF NOT EXISTS ix_today_hotspot_run ON today_hotspot (run_id, position)',
+        'CREATE INDEX IF NOT EXISTS ix_financial_calendar_run ON financial_calendar (run_id, position)',
+        *_backfill_run_statements(),
+    ]),
+    (6, '添加按来源和按日期的统计计数表，用触发器增量维护', _counter_statements()),
+    (7, '添加财经日历最近抓取时间索引，用于过期数据清理', [
+        'CREATE INDEX IF NOT EXISTS ix_financial_calendar_last_seen ON financial_calendar (last_seen)',
+    ]),
+    (8, '添加数据代数及其变化时间，每次写入数据时更新，供API缓存和 Last-Modified 判断数据是否变化', [
+        '''CREATE TABLE IF NOT EXISTS data_generation (
+               id INTEGER PRIMARY KEY CHECK (id = 1),
+               generation INTEGER NOT NULL,
+               updated_at TEXT
+           )''',
+        "INSERT OR IGNORE INTO data_generation (id, generation, updated_at) VALUES (1, 1, datetime('now', 'localtime'))",
+    ]),
+    (9, '建立双字全文索引，2个字的关键词也走 MATCH 和 BM25 排序', _bigram_index_statements()),
+]
+
 class DatabaseManager:
-    def __init__(self, db_name='hotspot_data.db'):
+    def __init__(self, db_name='hotspot_data.db', read_only=False, pool_size=4):
         self.db_name = db_name
-        self.conn = None
-        self.create_tables()
+        self.read_only = read_only
+        # 建表需要写权限，只读实例用一个临时的写连接池完成后关闭
+        if read_only:
+            writer = SQLitePool(db_name, pool_size=1, functions=SQL_FUNCTIONS)
+            self.create_tables(writer)
+            writer.close_all()
+        self.pool = SQLitePool(db_name, read_only=read_only, pool_size=pool_size, functions=SQL_FUNCTIONS)
+        if not read_only:
+            self.create_tables()
     
-    def connect(self):
-        """连接到数据库"""
-        try:
-            self.conn = sqlite3.connect(self.db_name)
-            self.conn.row_factory = sqlite3.Row
-            logging.info(f"成功连接到数据库: {self.db_name}")
-            return True
-        except sqlite3.Error as e:
-            logging.error(f"数据库连接失败: {e}")
-            return False
+    def close(self):
+        """关闭所有数据库连接"""
+        self.pool.close_all()
     
-    def create_tables(self):
+    def create_tables(self, pool=None):
         """创建数据表"""
-        if not self.connect():
-            return False
-        
+        pool = pool or self.pool
         try:
-            cursor = self.conn.cursor()
-            
-            # 热点资讯表
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS hot_news (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    rank TEXT,
-                    title TEXT NOT NULL,
-                    link TEXT,
-                    publish_time TEXT,
-                    heat TEXT,
-                    type TEXT NOT NULL,
-                    crawl_time TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # 今日热点表
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS today_hotspot (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    date TEXT,
-                    title TEXT NOT NULL,
-                    keywords TEXT,
-                    heat TEXT,
-                    type TEXT NOT NULL,
-                    crawl_time TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # 财经日历表
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS financial_calendar (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    date TEXT NOT NULL,
-                    event TEXT NOT NULL,
-                    type TEXT NOT NULL,
-                    crawl_time TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            self.conn.commit()
+            with pool.connection() as conn:
+                self._create_tables(conn)
+                self._migrate(conn)
             logging.info("数据表创建成功")
             return True
             
         except sqlite3.Error as e:
             logging.error(f"创建数据表失败: {e}")
             return False
-        finally:
-            if self.conn:
-                self.conn.close()
     
-    def insert_hot_news(self, data):
-        """插入热点资讯数据"""
-        if not self.connect():
-            return False
+    def _create_tables(self, conn):
+        """在给定连接上建表"""
+        cursor = conn.cursor()
+        
+        # 热点资讯表
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS hot_news (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                rank TEXT,
+                title TEXT NOT NULL,
+                link TEXT,
+                publish_time TEXT,
+                heat TEXT,
+                type TEXT NOT NULL,
+                crawl_time TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        # 今日热点表
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS today_hotspot (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                date TEXT,
+                title TEXT NOT NULL,
+                keywords TEXT,
+                heat TEXT,
+                type TEXT NOT NULL,
+                crawl_time TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
         
+        # 财经日历表
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS financial_calendar (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                date TEXT NOT NULL,
+                event TEXT NOT NULL,
+                type TEXT NOT NULL,
+                crawl_time TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        conn.commit()
+    
+    def _migrate(self, conn):
+        """执行尚未应用的结构迁移，每个版本一个事务"""
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+        for target, description, statements in MIGRATIONS:
+            if target <= version:
+                continue
+            try:
+                conn.execute('BEGIN')
+                for statement in statements:
+                    conn.execute(statement)
+                conn.execute(f'PRAGMA user_version = {int(target)}')
+                conn.commit()
+                logging.info(f"数据库迁移到版本 {target}: {description}")
+            except sqlite3.Error:
+                conn.rollback()
+                raise
+    
+    def _execute_batch(self, table, data, label):
+        """用一次 executemany 写入一张表，跳过自然键内容为空的记录"""
+        items = [item for item in data if ROW_CONTENT[table](item)]
+        if len(items) < len(data):
+            logging.warning(f"跳过 {len(data) - len(items)} 条缺少内容的{label}数据")
         try:
-            cursor = self.conn.cursor()
-            
-            for item in data:
-                cursor.execute('''
-                    INSERT INTO hot_news (rank, title, link, publish_time, heat, type, crawl_time)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    item.get('rank', ''),
-                    item.get('title', ''),
-                    item.get('link', ''),
-                    item.get('publish_time', ''),
-                    item.get('heat', ''),
-                    item.get('type', ''),
-                    item.get('crawl_time', '')
-                ))
-            
-            self.conn.commit()
-            logging.info(f"成功插入 {len(data)} 条热点资讯数据")
+            with self.pool.connection() as conn:
+                with conn:
+                    conn.executemany(INSERT_SQL[table], [ROW_PARAMS[table](item) + (None, None) for item in items])
+                    self.bump_generation(conn)
+            logging.info(f"成功写入 {len(items)} 条{label}数据")
             return True
             
         except sqlite3.Error as e:
-            logging.error(f"插入热点资讯数据失败: {e}")
+            logging.error(f"插入{label}数据失败: {e}")
             return False
-        finally:
-            if self.conn:
-                self.conn.close()
     
-    def insert_today_hotspot(self, data):
-        """插入今日热点数据"""
-        if not self.connect():
-            return False
-        
+    def bump_generation(self, conn):
+        """在当前写事务中递增数据代数并记录变化时间（本地时间），随事务一起提交"""
+        conn.execute(
+            "UPDATE data_generation SET generation = generation + 1, "
+            "updated_at = datetime('now', 'localtime') WHERE id = 1"
+        )
+    
+    def get_generation(self):
+        """获取当前数据代数，数据有任何写入都会变化；失败时返回 None"""
         try:
-            cursor = self.conn.cursor()
-            
-            for item in data:
-                cursor.execute('''
-                    INSERT INTO today_hotspot (date, title, keywords, heat, type, crawl_time)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                ''', (
-                    item.get('date', ''),
-                    item.get('title', ''),
-                    item.get('keywords', ''),
-                    item.get('heat', ''),
-                    item.get('type', ''),
-                    item.get('crawl_time', '')
-                ))
+            with self.pool.connection() as conn:
+                return conn.execute('SELECT generation FROM data_generation WHERE id = 1').fetchone()[0]
             
-            self.conn.commit()
-            logging.info(f"成功插入 {len(data)} 条今日热点数据")
-            return True
+        except sqlite3.Error as e:
+            logging.error(f"获取数据代数失败: {e}")
+            return None
+    
+    def get_data_version(self):
+        """获取数据代数及其最近一次变化的时间，用于HTTP条件请求；失败时返回 None
+
+        导入、清理和历史回填都会递增代数，变化时间随之更新，不会像抓取时间那样不变或倒退。
+        """
+        try:
+            with self.pool.connection() as conn:
+                row = conn.execute('SELECT generation, updated_at FROM data_generation WHERE id = 1').fetchone()
+                return {'generation': row['generation'], 'updated_at': row['updated_at']}
             
         except sqlite3.Error as e:
-            logging.error(f"插入今日热点数据失败: {e}")
-            return False
-        finally:
-            if self.conn:
-                self.conn.close()
+            logging.error(f"获取数据版本失败: {e}")
+            return None
+    
+    def insert_hot_news(self, data):
+        """插入热点资讯数据"""
+        return self._execute_batch('hot_news', data, '热点资讯')
+    
+    def insert_today_hotspot(self, data):
+        """插入今日热点数据"""
+        return self._execute_batch('today_hotspot', data, '今日热点')
     
     def insert_financial_calendar(self, data):
         """插入财经日历数据"""
-        if not self.connect():
-            return False
+        return self._execute_batch('financial_calendar', data, '财经日历')
+    
+    def bulk_import(self, data, source=None):
+        """在一个事务中写入一次抓取的全部结果
+        
+        data 为抓取结果字典（热点资讯/公社热帖/今日热点/财经日历），
+        每次导入记为一个抓取批次（crawl_runs），数据行通过 run_id 关联到最近一次看到它的批次。
+        有数据的类别会把最新批次指针（latest_runs）移到本批次；
+        本次未抓取或为空的类别保留上一批次的快照。
+        任何一张表写入失败都会整体回滚，读者不会看到导入了一半的数据，失败的批次单独记录。
+        自然键内容为空的记录不写入。
+        成功时返回批次号、各表实际存储的行数（同一批次中自然键相同的记录合并为一行）、
+        跳过的记录数、耗时和每秒写入条数，失败时返回 None。
+        """
+        categories = [category for category in CATEGORY_TABLES if data.get(category)]
+        counts = {category: len(data[category]) for category in categories}
+        crawl_times = [item.get('crawl_time') for category in categories for item in data[category]
+                       if item.get('crawl_time')]
+        started_at = min(crawl_times) if crawl_times else None
+        finished_at = max(crawl_times) if crawl_times else None
+        imported_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
+        start = time.perf_counter()
         try:
-            cursor = self.conn.cursor()
-            
-            for item in data:
-                cursor.execute('''
-                    INSERT INTO financial_calendar (date, event, type, crawl_time)
-                    VALUES (?, ?, ?, ?)
-                ''', (
-                    item.get('date', ''),
-                    item.get('event', ''),
-                    item.get('type', ''),
-                    item.get('crawl_time', '')
-                ))
-            
-            self.conn.commit()
-            logging.info(f"成功插入 {len(data)} 条财经日历数据")
-            return True
-            
+            with self.pool.connection() as conn:
+                with conn:
+                    run_id = conn.execute('''
+                        INSERT INTO crawl_runs (started_at, finished_at, imported_at, status, counts, source)
+                        VALUES (?, ?, ?, 'complete', ?, ?)
+                    ''', (started_at, finished_at, imported_at, json.dumps(counts, ensure_ascii=False), source)).lastrowid
+                    
+                    rows = {table: [] for table in INSERT_SQL}
+                    skipped = 0
+                    for category in categories:
+                        table = CATEGORY_TABLES[category]
+                        for position, item in enumerate(data[category]):
+                            if not ROW_CONTENT[table](item):
+                                skipped += 1
+                                continue
+                            if category == '公社热帖':
+                                # 公社热帖也存入热点资讯表，类型不同
+                                item = dict(item, type='公社热帖')
+                            rows[table].append(ROW_PARAMS[table](item) + (run_id, position))
+                    
+                    stored = {}
+                    for table, params in rows.items():
+                        if params:
+                            conn.executemany(INSERT_SQL[table], params)
+                        stored[table] = conn.execute(
+                            f'SELECT COUNT(*) FROM {table} WHERE run_id = ?', (run_id,)
+                        ).fetchone()[0]
+                    conn.executemany('''
+                        INSERT INTO latest_runs (category, run_id) VALUES (?, ?)
+                        ON CONFLICT(category) DO UPDATE SET run_id = excluded.run_id
+                    ''', [(category, run_id) for category in categories])
+                    self.bump_generation(conn)
         except sqlite3.Error as e:
-            logging.error(f"插入财经日历数据失败: {e}")
-            return False
-        finally:
-            if self.conn:
-                self.conn.close()
+            logging.error(f"批量导入失败，已回滚: {e}")
+            self._record_failed_run(started_at, finished_at, imported_at, counts, source, e)
+            return None
+        
+        seconds = time.perf_counter() - start
+        total = sum(stored.values())
+        rows_per_sec = total / seconds if seconds > 0 else 0.0
+        if skipped:
+            logging.warning(f"批次 {run_id} 跳过 {skipped} 条缺少内容的数据")
+        logging.info(f"批量导入批次 {run_id}: {total} 条数据，耗时 {seconds:.3f} 秒，{rows_per_sec:.0f} 条/秒")
+        return {
+            'run_id': run_id,
+            'counts': stored,
+            'total': total,
+            'skipped': skipped,
+            'seconds': round(seconds, 4),
+            'rows_per_sec': round(rows_per_sec, 1)
+        }
+    
+    def _record_failed_run(self, started_at, finished_at, imported_at, counts, source, error):
+        """记录导入失败的批次"""
+        try:
+            with self.pool.connection() as conn:
+                with conn:
+                    conn.execute('''
+                        INSERT INTO crawl_runs (started_at, finished_at, imported_at, status, counts, source, error)
+                        VALUES (?, ?, ?, 'failed', ?, ?, ?)
+                    ''', (started_at, finished_at, imported_at, json.dumps(counts, ensure_ascii=False), source, str(error)))
+        except sqlite3.Error as e:
+            logging.error(f"记录失败批次失败: {e}")
+    
+    def _read_latest_run(self, conn, category=None):
+        """在给定连接上读取最新批次，见 get_latest_run"""
+        if category:
+            row = conn.execute('''
+                SELECT crawl_runs.* FROM latest_runs
+                JOIN crawl_runs ON crawl_runs.id = latest_runs.run_id
+                WHERE latest_runs.category = ?
+            ''', (category,)).fetchone()
+        else:
+            row = conn.execute(
+                "SELECT * FROM crawl_runs WHERE status = 'complete' ORDER BY id DESC LIMIT 1"
+            ).fetchone()
+        if row is None:
+            return None
+        run = dict(row)
+        run['counts'] = json.loads(run['counts']) if run['counts'] else {}
+        return run
+    
+    def get_latest_run(self, category=None):
+        """获取最新的完整抓取批次；指定类别时返回该类别当前快照所在的批次"""
+        try:
+            with self.pool.connection() as conn:
+                return self._read_latest_run(conn, category)
+        
+        except sqlite3.Error as e:
+            logging.error(f"获取最新抓取批次失败: {e}")
+            return None
+    
+    def _read_snapshot(self, conn, category):
+        """在给定连接上读取快照，见 get_snapshot"""
+        table = CATEGORY_TABLES[category]
+        row = conn.execute('SELECT run_id FROM latest_runs WHERE category = ?', (category,)).fetchone()
+        if row is None:
+            return []
+        if table == 'hot_news':
+            # 热点资讯和公社热帖同在一张表，公社热帖以类型区分
+            rows = conn.execute(QUERY_SQL['hot_news_snapshot'],
+                                (row['run_id'], category == '公社热帖')).fetchall()
+        else:
+            rows = conn.execute(QUERY_SQL[f'{table}_snapshot'], (row['run_id'],)).fetchall()
+        return [dict(r) for r in rows]
+    
+    def get_snapshot(self, category):
+        """获取某个类别在最新批次中的完整列表（按抓取时的顺序），只读取单个批次"""
+        if category not in CATEGORY_TABLES:
+            raise ValueError(f"未知的数据类别: {category}")
+        try:
+            with self.pool.connection() as conn:
+                return self._read_snapshot(conn, category)
+        
+        except sqlite3.Error as e:
+            logging.error(f"获取{category}快照失败: {e}")
+            return []
     
     def import_from_json(self, json_file):
         """从JSON文件导入数据"""
@@ -187,24 +863,8 @@ class DatabaseManager:
             with open(json_file, 'r', encoding='utf-8') as f:
                 data = json.load(f)
             
-            # 插入热点资讯数据
-            if '热点资讯' in data:
-                self.insert_hot_news(data['热点资讯'])
-            
-            # 插入公社热帖数据（也存入热点资讯表，类型不同）
-            if '公社热帖' in data:
-                jiuyan_data = data['公社热帖']
-                for item in jiuyan_data:
-                    item['type'] = '公社热帖'
-                self.insert_hot_news(jiuyan_data)
-            
-            # 插入今日热点数据
-            if '今日热点' in data:
-                self.insert_today_hotspot(data['今日热点'])
-            
-            # 插入财经日历数据
-            if '财经日历' in data:
-                self.insert_financial_calendar(data['财经日历'])
+            if self.bulk_import(data, source=os.path.basename(json_file)) is None:
+                return False
             
             logging.info(f"从 {json_file} 导入数据完成")
             return True
@@ -213,164 +873,248 @@ class DatabaseManager:
             logging.error(f"导入JSON数据失败: {e}")
             return False
     
-    def get_hot_news(self, limit=50, news_type=None):
-        """获取热点资讯数据"""
-        if not self.connect():
-            return []
+    def backfill(self, pattern='complete_hotspot_data_*.json'):
+        """按文件时间顺序导入历史数据文件，每个文件一个事务"""
+        files = sorted(glob.glob(pattern), key=os.path.getmtime)
+        total = 0
+        start = time.perf_counter()
+        for json_file in files:
+            try:
+                with open(json_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except Exception as e:
+                logging.error(f"读取 {json_file} 失败: {e}")
+                continue
+            result = self.bulk_import(data, source=os.path.basename(json_file))
+            if result:
+                total += result['total']
+        
+        seconds = time.perf_counter() - start
+        rows_per_sec = total / seconds if seconds > 0 else 0.0
+        logging.info(f"历史数据导入完成: {len(files)} 个文件，{total} 条数据，{rows_per_sec:.0f} 条/秒")
+        return {'files': len(files), 'total': total, 'seconds': round(seconds, 4), 'rows_per_sec': round(rows_per_sec, 1)}
+    
+    def _fetch_page(self, name, params, limit, cursor, label, columns='*'):
+        """执行列表查询；有游标时从游标之后继续读取（键集分页，每页代价相同）
         
+        columns 为 select_columns 生成的列清单，只读取需要的列。
+        """
+        if cursor:
+            name = f"{name}_after"
+            params = params + (decode_cursor(cursor),)
+        sql = QUERY_SQL[name]
+        if columns != '*':
+            sql = sql.replace('SELECT *', f'SELECT {columns}', 1)
         try:
-            cursor = self.conn.cursor()
-            
-            if news_type:
-                cursor.execute('''
-                    SELECT * FROM hot_news 
-                    WHERE type = ? 
-                    ORDER BY created_at DESC 
-                    LIMIT ?
-                ''', (news_type, limit))
-            else:
-                cursor.execute('''
-                    SELECT * FROM hot_news 
-                    ORDER BY created_at DESC 
-                    LIMIT ?
-                ''', (limit,))
-            
-            results = []
-            for row in cursor.fetchall():
-                results.append(dict(row))
-            
-            return results
-            
+            with self.pool.connection() as conn:
+                rows = conn.execute(sql, params + (limit,)).fetchall()
+                return [dict(row) for row in rows]
+        
         except sqlite3.Error as e:
-            logging.error(f"获取热点资讯数据失败: {e}")
+            logging.error(f"获取{label}数据失败: {e}")
             return []
-        finally:
-            if self.conn:
-                self.conn.close()
     
-    def get_today_hotspot(self, limit=20):
+    def get_hot_news(self, limit=50, news_type=None, cursor=None, fields=None):
+        """获取热点资讯数据"""
+        columns = select_columns('hot_news', fields)
+        if news_type:
+            return self._fetch_page('hot_news_by_type', (news_type,), limit, cursor, '热点资讯', columns)
+        return self._fetch_page('hot_news', (), limit, cursor, '热点资讯', columns)
+    
+    def get_today_hotspot(self, limit=20, cursor=None, fields=None):
         """获取今日热点数据"""
-        if not self.connect():
+        columns = select_columns('today_hotspot', fields)
+        return self._fetch_page('today_hotspot', (), limit, cursor, '今日热点', columns)
+    
+    def get_financial_calendar(self, limit=50, date_filter=None, cursor=None, fields=None):
+        """获取财经日历数据"""
+        columns = select_columns('financial_calendar', fields)
+        if date_filter:
+            return self._fetch_page('financial_calendar_by_date', (date_filter,), limit, cursor, '财经日历', columns)
+        return self._fetch_page('financial_calendar', (), limit, cursor, '财经日历', columns)
+    
+    def get_community_posts(self, limit=50, cursor=None, fields=None):
+        """获取公社热帖数据"""
+        columns = select_columns('hot_news', fields)
+        return self._fetch_page('hot_news_by_type', ('公社热帖',), limit, cursor, '公社热帖', columns)
+    
+    def get_hottest(self, limit=10, hours=24, news_type=None, source='hot_news', since=None, until=None):
+        """获取时间窗口内热度最高的条目
+        
+        窗口按 last_seen（最近一次被抓取到的时间）计算，默认为最近 hours 小时；
+        source 为 hot_news（热点资讯/公社热帖）或 today_hotspot（今日热点）。
+        """
+        now = datetime.now()
+        since = since or (now - timedelta(hours=hours)).strftime("%Y-%m-%d %H:%M:%S")
+        until = until or now.strftime("%Y-%m-%d %H:%M:%S")
+        
+        if source == 'today_hotspot':
+            return self._fetch_page('today_hotspot_hottest', (since, until), limit, None, '今日热点')
+        if source != 'hot_news':
+            raise ValueError(f"不支持的数据来源: {source}")
+        if news_type:
+            return self._fetch_page('hot_news_hottest_by_type', (news_type, since, until), limit, None, '热点资讯')
+        return self._fetch_page('hot_news_hottest', (since, until), limit, None, '热点资讯')
+    
+    def search(self, keyword, limit=20, news_type=None, date_from=None, date_to=None):
+        """全文搜索热点资讯、今日热点和财经日历
+        
+        关键词按空格拆分，需同时命中。至少3个字符的词在 trigram 索引 search_index 上匹配，
+        2个字符的词在双字索引 search_bigrams 上匹配，两者都按 BM25 排序；
+        只有单字关键词时改为 LIKE 过滤并按日期倒序。摘要经过HTML转义，关键词用 <mark> 标出。
+        """
+        terms = [term for term in keyword.split() if term]
+        if not terms:
             return []
+        long_terms = [term for term in terms if len(term) >= 3]
+        bigram_terms = [term for term in terms if len(term) == 2 and _bigram_phrase(term)]
+        like_terms = [term for term in terms if term not in long_terms and term not in bigram_terms]
+        
+        joins = ''
+        conditions = []
+        params = []
+        scores = []
+        if long_terms:
+            conditions.append('search_index MATCH ?')
+            params.append(' '.join('"' + term.replace('"', '""') + '"' for term in long_terms))
+            scores.append('bm25(search_index, 2.0, 1.0)')
+        if bigram_terms:
+            joins = 'JOIN search_bigrams ON search_bigrams.rowid = search_index.rowid'
+            conditions.append('search_bigrams MATCH ?')
+            params.append(' '.join(_bigram_phrase(term) for term in bigram_terms))
+            scores.append('bm25(search_bigrams, 2.0, 1.0)')
+        for term in like_terms:
+            conditions.append("(search_index.title LIKE ? ESCAPE '\\' OR search_index.body LIKE ? ESCAPE '\\')")
+            params += [_like_pattern(term), _like_pattern(term)]
+        if news_type:
+            conditions.append('search_index.type = ?')
+            params.append(news_type)
+        if date_from:
+            conditions.append('search_index.date >= ?')
+            params.append(date_from)
+        if date_to:
+            conditions.append('search_index.date <= ?')
+            params.append(date_to)
+        
+        if long_terms:
+            snippet = "snippet(search_index, -1, char(2), char(3), '…', 24)"
+        else:
+            snippet = 'NULL'
+        if scores:
+            score = ' + '.join(scores)
+            order = 'score'
+        else:
+            score = 'NULL'
+            order = 'search_index.date DESC, search_index.rowid DESC'
+        
+        sql = f"""
+            SELECT search_index.source, search_index.source_id, search_index.type, search_index.date,
+                   search_index.title, search_index.body, {snippet} AS snippet, {score} AS score
+            FROM search_index {joins}
+            WHERE {' AND '.join(conditions)}
+            ORDER BY {order}
+            LIMIT ?
+        """
+        params.append(limit)
+        # snippet() 只标出长关键词，其余关键词在 Python 中标出
+        other_terms = [term for term in terms if term not in long_terms]
         
         try:
-            cursor = self.conn.cursor()
-            cursor.execute('''
-                SELECT * FROM today_hotspot 
-                ORDER BY created_at DESC 
-                LIMIT ?
-            ''', (limit,))
-            
-            results = []
-            for row in cursor.fetchall():
-                results.append(dict(row))
-            
-            return results
+            with self.pool.connection() as conn:
+                results = []
+                for row in conn.execute(sql, params):
+                    result = dict(row)
+                    text = result['snippet']
+                    if text is None:
+                        text = result['title'] if any(t in result['title'] for t in other_terms) else result['body']
+                    result['snippet'] = _highlight(_mark_terms(text, other_terms))
+                    if result['score'] is not None:
+                        # bm25 越小越相关，取反后越大越相关
+                        result['score'] = round(-result['score'], 4)
+                    results.append(result)
+                return results
             
         except sqlite3.Error as e:
-            logging.error(f"获取今日热点数据失败: {e}")
+            logging.error(f"搜索数据失败: {e}")
             return []
-        finally:
-            if self.conn:
-                self.conn.close()
     
-    def get_financial_calendar(self, limit=50, date_filter=None):
-        """获取财经日历数据"""
-        if not self.connect():
-            return []
+    def get_bundle(self, categories=None):
+        """一次获取多个类别的最新快照和批次信息（批次号、抓取时间、条数），默认全部类别
+        
+        所有读取在同一个读事务中完成，期间有导入提交时 meta 和 data 仍来自同一次导入。失败时返回 None。
+        """
+        categories = categories or list(CATEGORY_TABLES)
+        for category in categories:
+            if category not in CATEGORY_TABLES:
+                raise ValueError(f"未知的数据类别: {category}")
         
+        data = {}
+        runs = {}
         try:
-            cursor = self.conn.cursor()
-            
-            if date_filter:
-                cursor.execute('''
-                    SELECT * FROM financial_calendar 
-                    WHERE date = ? 
-                    ORDER BY created_at DESC 
-                    LIMIT ?
-                ''', (date_filter, limit))
-            else:
-                cursor.execute('''
-                    SELECT * FROM financial_calendar 
-                    ORDER BY created_at DESC 
-                    LIMIT ?
-                ''', (limit,))
-            
-            results = []
-            for row in cursor.fetchall():
-                results.append(dict(row))
-            
-            return results
-            
+            with self.pool.connection() as conn:
+                conn.execute('BEGIN')
+                for category in categories:
+                    data[category] = self._read_snapshot(conn, category)
+                    run = self._read_latest_run(conn, category)
+                    runs[category] = {
+                        'run_id': run['id'] if run else None,
+                        'crawl_time': run['finished_at'] if run else None,
+                        'count': len(data[category])
+                    }
+                conn.commit()
+        
         except sqlite3.Error as e:
-            logging.error(f"获取财经日历数据失败: {e}")
-            return []
-        finally:
-            if self.conn:
-                self.conn.close()
-    
-    def get_community_posts(self, limit=50):
-        """获取公社热帖数据"""
-        if not self.connect():
-            return []
+            logging.error(f"获取数据包失败: {e}")
+            return None
         
+        run_ids = [run['run_id'] for run in runs.values() if run['run_id'] is not None]
+        crawl_times = [run['crawl_time'] for run in runs.values() if run['crawl_time']]
+        return {
+            'meta': {
+                'run_id': max(run_ids) if run_ids else None,
+                'crawl_time': max(crawl_times) if crawl_times else None,
+                'counts': {category: run['count'] for category, run in runs.items()},
+                'runs': runs
+            },
+            'data': data
+        }
+    
+    def get_data_statistics(self):
+        """获取数据统计信息（读取计数表，与数据量无关）"""
         try:
-            cursor = self.conn.cursor()
-            cursor.execute('''
-                SELECT * FROM hot_news 
-                WHERE type = '公社热帖' 
-                ORDER BY created_at DESC 
-                LIMIT ?
-            ''', (limit,))
-            
-            results = []
-            for row in cursor.fetchall():
-                results.append(dict(row))
-            
-            return results
+            with self.pool.connection() as conn:
+                statistics = {}
+                for row in conn.execute('SELECT source, count FROM stats_totals'):
+                    statistics[row['source']] = row['count']
+                
+                # 今日热点、财经日历没有数据时也返回0
+                statistics.setdefault('今日热点', 0)
+                statistics.setdefault('财经日历', 0)
+                
+                # 总数据量
+                total = sum(statistics.values())
+                statistics['总计'] = total
+                
+                return statistics
             
         except sqlite3.Error as e:
-            logging.error(f"获取公社热帖数据失败: {e}")
-            return []
-        finally:
-            if self.conn:
-                self.conn.close()
-
-    def get_data_statistics(self):
-        """获取数据统计信息"""
-        if not self.connect():
+            logging.error(f"获取数据统计失败: {e}")
             return {}
-        
+    
+    def get_daily_statistics(self, days=30):
+        """按首次抓取日期统计最近 days 天每个来源新增的数据量"""
+        since = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
         try:
-            cursor = self.conn.cursor()
-            
-            statistics = {}
-            
-            # 热点资讯统计
-            cursor.execute('SELECT COUNT(*) as count, type FROM hot_news GROUP BY type')
-            for row in cursor.fetchall():
-                statistics[row['type']] = row['count']
-            
-            # 今日热点统计
-            cursor.execute('SELECT COUNT(*) as count FROM today_hotspot')
-            statistics['今日热点'] = cursor.fetchone()['count']
-            
-            # 财经日历统计
-            cursor.execute('SELECT COUNT(*) as count FROM financial_calendar')
-            statistics['财经日历'] = cursor.fetchone()['count']
-            
-            # 总数据量
-            total = sum(statistics.values())
-            statistics['总计'] = total
-            
-            return statistics
+            with self.pool.connection() as conn:
+                daily = {}
+                for row in conn.execute(QUERY_SQL['statistics_by_day'], (since,)):
+                    daily.setdefault(row['day'], {})[row['source']] = row['count']
+                return daily
             
         except sqlite3.Error as e:
-            logging.error(f"获取数据统计失败: {e}")
+            logging.error(f"获取按日统计失败: {e}")
             return {}
-        finally:
-            if self.conn:
-                self.conn.close()
+
 
 def main():
     """主函数"""
@@ -380,9 +1124,14 @@ def main():
     # 创建数据库管理器
     db_manager = DatabaseManager()
     
+    # python database_manager.py backfill [文件模式] 批量导入历史数据文件
+    if len(sys.argv) > 1 and sys.argv[1] == 'backfill':
+        pattern = sys.argv[2] if len(sys.argv) > 2 else 'complete_hotspot_data_*.json'
+        result = db_manager.backfill(pattern)
+        print(f"导入 {result['files']} 个文件，共 {result['total']} 条数据，{result['rows_per_sec']} 条/秒")
+        return
+    
     # 获取并导入最新的JSON数据
-    import glob
-    import os
     json_files = glob.glob("hotspot_data_*.json")
     if json_files:
         json_file = max(json_files, key=os.path.getmtime)
@@ -0,0 +1,100 @@
+"""
+SQLite连接池
+
+连接长期复用，不再每次调用都打开/关闭数据库。
+每个连接同一时间只借给一个线程使用，用完归还到池中。
+写连接开启WAL日志，读写互不阻塞；新建的库同时开启增量回收（auto_vacuum=INCREMENTAL）。
+只读模式以 mode=ro 打开，所有连接统一设置 mmap、页缓存等参数，并注册SQL中（如触发器里）调用的Python函数。
+"""
+
+import os
+import queue
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+
+
+class SQLitePool:
+    def __init__(self, db_name, read_only=False, pool_size=4, timeout=10,
+                 mmap_size=256 * 1024 * 1024, cache_size_kb=32 * 1024, functions=None):
+        self.db_name = db_name
+        self.read_only = read_only
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.mmap_size = mmap_size
+        self.cache_size_kb = cache_size_kb
+        # 函数名 -> (参数个数, Python函数)
+        self.functions = functions or {}
+        self._idle = queue.LifoQueue(maxsize=pool_size)
+        self._lock = threading.Lock()
+        self._all = set()
+
+    def _open(self):
+        """打开一个新连接并设置参数"""
+        if self.read_only:
+            uri = f"file:{os.path.abspath(self.db_name)}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, timeout=self.timeout, check_same_thread=False)
+        else:
+            conn = sqlite3.connect(self.db_name, timeout=self.timeout, check_same_thread=False)
+            # 只对还没有建表的新库生效，且必须在切换到WAL之前设置；已有库由 retention.py 转换
+            conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA foreign_keys=ON')
+        conn.execute(f'PRAGMA mmap_size={int(self.mmap_size)}')
+        conn.execute(f'PRAGMA cache_size={-int(self.cache_size_kb)}')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        for name, (num_params, func) in self.functions.items():
+            conn.create_function(name, num_params, func, deterministic=True)
+
+        with self._lock:
+            self._all.add(conn)
+        logging.info(f"成功连接到数据库: {self.db_name}{' (只读)' if self.read_only else ''}")
+        return conn
+
+    def _discard(self, conn):
+        with self._lock:
+            self._all.discard(conn)
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    @contextmanager
+    def connection(self):
+        """借出一个连接，退出时归还；未提交的事务会被回滚"""
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._open()
+
+        try:
+            yield conn
+        except Exception:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            try:
+                self._idle.put_nowait(conn)
+            except queue.Full:
+                self._discard(conn)
+
+    def close_all(self):
+        """关闭池中所有连接"""
+        while True:
+            try:
+                self._idle.get_nowait()
+            except queue.Empty:
+                break
+        with self._lock:
+            conns, self._all = self._all, set()
+        for conn in conns:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
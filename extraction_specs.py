@@ -0,0 +1,293 @@
+"""
+声明式抽取规格
+
+每种页面结构用一份规格描述：选择器、字段转换和默认值。
+模块导入时把规格编译成使用预编译XPath的抽取器，所有爬虫类共用，
+避免同一套抽取逻辑在多个文件里各自演变。
+
+规格格式：
+    groups        可选，分组元素（如每个日期一个面板），可以是多个XPath，依次尝试，取第一个有匹配的
+    group_fields  可选，分组级字段，合并进该组的每条记录
+    row_container 可选，组内行的容器，缺失时记录 missing_container_warning
+    rows          行元素
+    fields        行字段：select 为一个或多个XPath（依次尝试，取第一个匹配的元素），
+                  attr 表示取属性而不是文本，transform 为转换函数，default 为元素缺失时的值
+"""
+
+import logging
+from datetime import datetime
+from bs4 import BeautifulSoup
+import lxml_parser
+
+if lxml_parser.LXML_AVAILABLE:
+    from lxml import etree
+
+XPATH_NAMESPACES = {'re': 'http://exslt.org/regular-expressions'}
+
+HEAT_STYLE = 'width:90px;display:inline-block;'
+
+# 元素缺失的标记
+MISSING = object()
+
+
+def has_class(name):
+    """与 BeautifulSoup 的 class_='name'（单个类名）匹配规则相同的XPath条件"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def absolute_url(href):
+    """补全协议相对链接"""
+    if href and not href.startswith('http'):
+        href = f"https:{href}" if href.startswith('//') else href
+    return href
+
+
+def strip_prefix(prefix):
+    return lambda text: text.replace(prefix, '')
+
+
+KEYWORD_INFO = "following-sibling::div[@style='color:#999;'][1]"
+
+
+def section_panels(section_id):
+    """整页中 id 为 section_id 的面板；接口返回的HTML片段没有该面板时取所有日期面板"""
+    return [f"//div[@id='{section_id}']", "//div[@class='panel panel-danger']"]
+
+SPECS = {
+    # 热点资讯 / 公社热帖
+    'hot_items': {
+        'rows': "//div[@class='item flex']",
+        'fields': {
+            'rank': {'select': f".//div[{has_class('no')}]", 'default': ''},
+            'title': {'select': './/a', 'default': ''},
+            'link': {'select': './/a', 'attr': 'href', 'transform': absolute_url, 'default': ''},
+            'publish_time': {'select': f".//span[{has_class('time')}]", 'default': ''},
+            # 优先取固定宽度的热度span，没有时取文本为"热度：数字"的span
+            'heat': {
+                'select': [
+                    f".//span[@style='{HEAT_STYLE}']",
+                    ".//span[count(node())=1 and re:test(text(), '热度：[0-9]+')]"
+                ],
+                'transform': strip_prefix('热度：'),
+                'default': ''
+            },
+        }
+    },
+    # 今日热点：每个日期一个面板，面板内为关键词块
+    'today_hotspot': {
+        'groups': "//div[@class='panel panel-danger']",
+        'empty_warning': "未找到今日热点面板",
+        'group_fields': {
+            'date': {'select': f".//div[{has_class('panel-heading')}]", 'default': ''},
+        },
+        'rows': f".//div[{has_class('keyword')}]",
+        'fields': {
+            'title': {'select': ['.//b', '.'], 'default': ''},
+            'keywords': {'select': f"{KEYWORD_INFO}//i", 'default': ''},
+            'heat': {'select': f"{KEYWORD_INFO}//span", 'transform': strip_prefix('热度值：'), 'default': ''},
+        }
+    },
+    # 财经日历：每个日期一个面板，面板内为事件列表
+    'calendar': {
+        'groups': "//div[@class='panel panel-danger']",
+        'group_fields': {
+            'date': {'select': f".//div[{has_class('panel-heading')}]", 'default': ''},
+        },
+        'row_container': f".//ul[{has_class('list-group')}]",
+        'missing_container_warning': "未找到日期 {date} 的事件列表",
+        'rows': f".//li[{has_class('list-group-item')}]",
+        'fields': {
+            'event': {'select': '.', 'default': ''},
+        }
+    },
+}
+
+# 今日热点（SpecialHotSpotCrawler）/ 财经日历（AdvancedHotSpotCrawler）：规则与接口返回的面板相同，
+# 只是先找整页中的 #chaosha / #timeline 面板
+SPECS['chaosha'] = dict(SPECS['today_hotspot'], groups=section_panels('chaosha'))
+SPECS['timeline'] = dict(SPECS['calendar'], groups=section_panels('timeline'), empty_warning="未找到财经日历面板")
+
+# 热点条目元素缺失时的默认值
+HOT_ITEM_DEFAULTS = {'rank': "无排名", 'title': "无标题", 'publish_time': "未知时间", 'heat': "0"}
+
+# 热点条目的类型名
+HOT_ITEM_TYPES = {'ths': '热点资讯', 'jiuyan': '公社热帖'}
+
+
+def _as_list(value):
+    return value if isinstance(value, list) else [value]
+
+
+class CompiledField:
+    """编译后的字段抽取器"""
+
+    def __init__(self, name, spec):
+        self.name = name
+        self.selectors = [etree.XPath(path, namespaces=XPATH_NAMESPACES) for path in _as_list(spec['select'])]
+        self.attr = spec.get('attr')
+        self.transform = spec.get('transform')
+        self.default = spec.get('default', '')
+
+    def extract(self, node):
+        for selector in self.selectors:
+            found = selector(node)
+            if found:
+                element = found[0]
+                break
+        else:
+            return MISSING
+
+        value = element.get(self.attr, '') if self.attr else lxml_parser.text_of(element)
+        return self.transform(value) if self.transform else value
+
+
+class CompiledSpec:
+    """编译后的页面抽取器"""
+
+    def __init__(self, name, spec):
+        self.name = name
+        self.spec = spec
+        self.groups = [etree.XPath(path) for path in _as_list(spec['groups'])] if 'groups' in spec else None
+        self.group_fields = [CompiledField(n, s) for n, s in spec.get('group_fields', {}).items()]
+        self.row_container = etree.XPath(spec['row_container']) if 'row_container' in spec else None
+        self.rows = etree.XPath(spec['rows'])
+        self.fields = [CompiledField(n, s) for n, s in spec['fields'].items()]
+
+    @staticmethod
+    def _resolve(field, value, defaults):
+        if value is MISSING:
+            return defaults.get(field.name, field.default) if defaults else field.default
+        return value
+
+    def _extract_rows(self, node, base, defaults):
+        return [
+            dict(base, **{field.name: self._resolve(field, field.extract(row), defaults) for field in self.fields})
+            for row in self.rows(node)
+        ]
+
+    def extract(self, html_content, defaults=None):
+        """抽取记录列表；defaults 可覆盖元素缺失时的默认值"""
+        doc = lxml_parser.parse_document(html_content)
+        if doc is None:
+            return []
+
+        if self.groups is None:
+            return self._extract_rows(doc, {}, defaults)
+
+        groups = []
+        for selector in self.groups:
+            groups = selector(doc)
+            if groups:
+                break
+        if not groups and self.spec.get('empty_warning'):
+            logging.warning(self.spec['empty_warning'])
+
+        results = []
+        for group in groups:
+            base = {field.name: self._resolve(field, field.extract(group), defaults) for field in self.group_fields}
+            container = group
+            if self.row_container is not None:
+                found = self.row_container(group)
+                if not found:
+                    logging.warning(self.spec['missing_container_warning'].format(**base))
+                    continue
+                container = found[0]
+            results.extend(self._extract_rows(container, base, defaults))
+        return results
+
+
+# 导入时编译一次
+COMPILED = {name: CompiledSpec(name, spec) for name, spec in SPECS.items()} if lxml_parser.LXML_AVAILABLE else {}
+
+
+def extract(name, html_content, defaults=None):
+    """用编译好的规格抽取记录"""
+    return COMPILED[name].extract(html_content, defaults)
+
+
+def finish_rows(name, rows, defaults=None):
+    """对其他后端（如流式提取器）产出的原始字段应用同一套转换和默认值
+
+    rows 中值为 None 的字段表示元素缺失。逐条产出，可以直接接在
+    stream_parser.iter_hot_items 后面边解析边处理。不依赖lxml。
+    """
+    fields = SPECS[name]['fields']
+    for row in rows:
+        record = {}
+        for field_name, spec in fields.items():
+            value = row.get(field_name)
+            if value is None:
+                value = defaults.get(field_name, spec.get('default', '')) if defaults else spec.get('default', '')
+            elif spec.get('transform'):
+                value = spec['transform'](value)
+            record[field_name] = value
+        yield record
+
+
+def tag_records(rows, type_name):
+    """给抽取出的行补上类型和抓取时间"""
+    return [
+        dict(row, type=type_name, crawl_time=datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+        for row in rows
+    ]
+
+
+# html.parser 后端：按与 today_hotspot / calendar 规格相同的规则用 BeautifulSoup 抽取日期面板，
+# 供未安装lxml或指定 parser_backend='html.parser' 时使用
+
+def _soup_panels(soup, section_id):
+    """BeautifulSoup 版本的 section_panels"""
+    if section_id:
+        panel = soup.find('div', id=section_id)
+        if panel:
+            return [panel]
+    return soup.find_all('div', class_='panel panel-danger')
+
+
+def _soup_text(element):
+    return element.get_text(strip=True) if element else ''
+
+
+def _soup_keyword_rows(panel, base):
+    rows = []
+    for block in panel.find_all('div', class_='keyword'):
+        title_b = block.find('b')
+        info = block.find_next_sibling('div', style="color:#999;")
+        rows.append(dict(
+            base,
+            title=_soup_text(title_b) if title_b else _soup_text(block),
+            keywords=_soup_text(info.find('i')) if info else '',
+            heat=_soup_text(info.find('span')).replace('热度值：', '') if info else '',
+        ))
+    return rows
+
+
+def _soup_event_rows(panel, base):
+    event_list = panel.find('ul', class_='list-group')
+    if not event_list:
+        logging.warning(SPECS['calendar']['missing_container_warning'].format(**base))
+        return []
+    return [dict(base, event=_soup_text(event)) for event in event_list.find_all('li', class_='list-group-item')]
+
+
+SOUP_PANELS = {
+    'today_hotspot': (None, _soup_keyword_rows),
+    'chaosha': ('chaosha', _soup_keyword_rows),
+    'calendar': (None, _soup_event_rows),
+    'timeline': ('timeline', _soup_event_rows),
+}
+
+
+def soup_extract(name, html_content):
+    """用 BeautifulSoup（html.parser）抽取日期面板类规格的记录，结果与 extract 相同"""
+    if not html_content or not html_content.strip():
+        return []
+    section_id, extract_rows = SOUP_PANELS[name]
+    panels = _soup_panels(BeautifulSoup(html_content, 'html.parser'), section_id)
+    if not panels and SPECS[name].get('empty_warning'):
+        logging.warning(SPECS[name]['empty_warning'])
+
+    results = []
+    for panel in panels:
+        results.extend(extract_rows(panel, {'date': _soup_text(panel.find('div', class_='panel-heading'))}))
+    return results
@@ -6,8 +6,15 @@ import time
 from datetime import datetime
 import random
 import logging
-from urllib3.util.retry import Retry
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from requests.adapters import HTTPAdapter
+from rate_limiter import HostPolitenessLimiter
+from mirror_stats import LatencyWindow, MirrorRouter
+from retry_policy import RetryPolicy
+import lxml_parser
+import extraction_specs
+import stream_parser
 
 # 配置日志
 logging.basicConfig(
@@ -20,27 +27,42 @@ logging.basicConfig(
 )
 
 class HotSpotCrawler:
-    def __init__(self):
+    def __init__(self, politeness_interval=0.3, hedge=False, hedge_percentile=95, hedge_default_delay=2.0,
+                 retry_policy=None, parser_backend=None, category_backends=None):
         self.base_url = "https://duanxianxia.com"
         self.backup_urls = [
             "https://ddxia.pages.dev",
             "https://hot.duanxianxia.com"
         ]
+        # 唯一的重试层：每次运行共享截止时间和重试预算
+        self.retry_policy = retry_policy or RetryPolicy()
+        # requests.Session 不是线程安全的，并发模式下每个线程使用独立会话
+        self._local = threading.local()
         self.session = self.create_session()
-        self.current_url_index = 0
+        self._local.session = self.session
+        # 按延迟、错误率和空响应率为各源站打分，选择最健康的源站
+        self.router = MirrorRouter([self.base_url] + self.backup_urls)
+        # 按主机限速，替代类别之间的固定等待
+        self.limiter = HostPolitenessLimiter(min_interval=politeness_interval)
+        # 对冲请求：主站在其近期延迟的某个分位数内未响应时，向下一个镜像发出相同请求
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_default_delay = hedge_default_delay
+        self.latency = LatencyWindow()
+        # 对冲请求使用长期存在的线程池：线程复用各自的会话，对冲请求不必每次重新建立TCP/TLS连接
+        self._hedge_pool = None
+        # category_backends 可为单个类别指定解析后端，例如 {'ths': 'stream'}
+        self.parser_backend = lxml_parser.resolve_backend(parser_backend)
+        self.category_backends = {
+            news_type: lxml_parser.resolve_backend(backend)
+            for news_type, backend in (category_backends or {}).items()
+        }
     
     def create_session(self):
-        """创建带有重试机制的会话"""
+        """创建会话（重试由 RetryPolicy 统一负责，连接层不再重试）"""
         session = requests.Session()
         
-        # 设置重试策略
-        retry_strategy = Retry(
-            total=3,
-            backoff_factor=0.5,
-            status_forcelist=[429, 500, 502, 503, 504],
-            allowed_methods=["GET", "POST"]
-        )
-        adapter = HTTPAdapter(max_retries=retry_strategy)
+        adapter = HTTPAdapter(max_retries=0)
         session.mount("http://", adapter)
         session.mount("https://", adapter)
         
@@ -52,6 +74,14 @@ class HotSpotCrawler:
         
         return session
     
+    def get_session(self):
+        """获取当前线程的会话"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self.create_session()
+            self._local.session = session
+        return session
+    
     def get_headers(self):
         """获取随机的浏览器头信息"""
         user_agents = [
@@ -77,16 +107,37 @@ class HotSpotCrawler:
             'Sec-Fetch-Site': 'same-origin',
         }
     
-    def rotate_url(self):
-        """轮换URL地址"""
-        self.current_url_index = (self.current_url_index + 1) % len(self.backup_urls)
-        return self.backup_urls[self.current_url_index]
+    def rotate_url(self, exclude=()):
+        """选择下一个源站：按健康评分挑选，跳过冷却中和本轮已尝试过的源站"""
+        return self.router.choose(exclude=exclude)
     
-    def get_hot_news(self, news_type, max_retries=3):
-        """获取不同类型的热点新闻，支持重试和URL轮换"""
-        for attempt in range(max_retries):
+    def get_hot_news(self, news_type, max_retries=None):
+        """获取不同类型的热点新闻，按统一重试策略重试并切换源站
+        
+        在 get_all_hotspots 之外单独调用时，本次调用使用自己的截止时间和重试预算。
+        """
+        with self.retry_policy.call_scope():
+            if self.hedge:
+                return self.get_hot_news_hedged(news_type)
+            return self._get_hot_news_with_retries(news_type, max_retries)
+    
+    def _deadline_cut(self, error, timeout):
+        """请求超时是否只是因为截止时间缩短了超时，这种情况不算源站故障"""
+        return (isinstance(error, requests.exceptions.Timeout)
+                and timeout < self.retry_policy.request_timeout)
+    
+    def _get_hot_news_with_retries(self, news_type, max_retries=None):
+        """顺序模式：失败后退避，换一个源站重试"""
+        session = self.get_session()
+        policy = self.retry_policy
+        tried = []
+        attempt = 0
+        while policy.remaining() > 0:
+            current_base_url = self.rotate_url(exclude=tried)
+            tried.append(current_base_url)
+            started = time.monotonic()
+            timeout = policy.request_timeout
             try:
-                current_base_url = self.backup_urls[self.current_url_index] if attempt > 0 else self.base_url
                 url = f"{current_base_url}/api/getHotNewsByType"
                 
                 payload = {
@@ -94,44 +145,192 @@ class HotSpotCrawler:
                 }
                 
                 # 每次请求更新headers
-                self.session.headers.update(self.get_headers())
+                session.headers.update(self.get_headers())
                 
-                logging.info(f"尝试获取 {news_type} 数据 (尝试 {attempt + 1}/{max_retries})")
-                response = self.session.post(url, data=payload, timeout=15)
+                self.limiter.acquire(url)
+                timeout = policy.timeout_for_request()
+                if timeout <= 0:
+                    logging.warning(f"{news_type} 已到截止时间，不再发起请求")
+                    break
+                started = time.monotonic()
+                logging.info(f"尝试从 {current_base_url} 获取 {news_type} 数据 (尝试 {attempt + 1})")
+                response = session.post(url, data=payload, timeout=timeout)
                 response.raise_for_status()
+                elapsed = time.monotonic() - started
+                self.latency.record(current_base_url, elapsed)
                 
                 data = response.json()
                 if data.get('result') == 'success':
                     html_content = data.get('html', '')
+                    self.router.record(current_base_url, elapsed, ok=True, empty=not html_content)
                     if html_content:
+                        policy.record_attempt(news_type, attempt, '成功')
                         results = self.parse_hot_news(html_content, news_type)
                         logging.info(f"成功获取 {news_type} {len(results)} 条数据")
                         return results
                     else:
-                        logging.warning(f"{news_type} 返回空HTML内容")
+                        outcome = '返回空HTML内容'
                 else:
-                    logging.warning(f"{news_type} API返回失败: {data}")
-                
-                # 如果失败，轮换URL
-                if attempt < max_retries - 1:
-                    self.rotate_url()
-                    logging.info(f"轮换到备用URL: {self.backup_urls[self.current_url_index]}")
-                    time.sleep(2)  # 等待一段时间再重试
+                    self.router.record(current_base_url, elapsed, ok=False)
+                    outcome = f"API返回失败: {data}"
                     
             except requests.exceptions.RequestException as e:
-                logging.error(f"第 {attempt + 1} 次尝试获取 {news_type} 失败: {str(e)}")
-                if attempt < max_retries - 1:
-                    self.rotate_url()
-                    logging.info(f"请求异常，轮换到备用URL: {self.backup_urls[self.current_url_index]}")
-                    time.sleep(3)
-                else:
-                    logging.error(f"获取 {news_type} 数据全部尝试失败")
+                if not self._deadline_cut(e, timeout):
+                    self.router.record(current_base_url, time.monotonic() - started, ok=False)
+                outcome = f"请求异常: {str(e)}"
             except Exception as e:
+                policy.record_attempt(news_type, attempt, f"未知错误: {str(e)}")
                 logging.error(f"处理 {news_type} 数据时发生未知错误: {str(e)}")
                 break
+            
+            policy.record_attempt(news_type, attempt, outcome)
+            delay = policy.next_delay(news_type, attempt, max_retries)
+            if delay is None:
+                break
+            # 换一个源站，退避后重试
+            time.sleep(delay)
+            attempt += 1
+        
+        logging.error(f"获取 {news_type} 数据全部尝试失败")
+        return []
+    
+    def _request_origin(self, origin, news_type, cancelled):
+        """向单个源站请求一次数据，成功返回HTML内容，失败抛出异常"""
+        url = f"{origin}/api/getHotNewsByType"
+        self.limiter.acquire(url)
+        if cancelled.is_set():
+            return None
+        
+        # 截止时间已到时不再发出请求
+        timeout = self.retry_policy.timeout_for_request()
+        if timeout <= 0:
+            return None
+        
+        session = self.get_session()
+        session.headers.update(self.get_headers())
+        started = time.monotonic()
+        try:
+            response = session.post(url, data={'type': news_type}, timeout=timeout)
+            response.raise_for_status()
+            data = response.json()
+        except Exception as e:
+            if not self._deadline_cut(e, timeout):
+                self.router.record(origin, time.monotonic() - started, ok=False)
+            raise
+        elapsed = time.monotonic() - started
+        self.latency.record(origin, elapsed)
+        
+        if data.get('result') != 'success':
+            self.router.record(origin, elapsed, ok=False)
+            raise ValueError(f"API返回失败: {data}")
+        html_content = data.get('html', '')
+        self.router.record(origin, elapsed, ok=True, empty=not html_content)
+        if not html_content:
+            raise ValueError("返回空HTML内容")
+        return html_content
+    
+    def get_hedge_pool(self, origin_count):
+        """获取对冲请求的线程池，首次使用时创建
+        
+        线程数为源站数的两倍，为上一次调用中仍在进行的请求留出余量。"""
+        if self._hedge_pool is None:
+            self._hedge_pool = ThreadPoolExecutor(max_workers=origin_count * 2, thread_name_prefix='hedge')
+        return self._hedge_pool
+    
+    def get_hot_news_hedged(self, news_type):
+        """对冲请求模式：主站超过其近期延迟分位数仍未响应时，依次向备用镜像发出相同请求，
+        采用最先成功的响应
+        
+        第一个请求之外的每个对冲请求都从重试预算中扣除，截止时间到后不再等待或发出请求。
+        取得结果后只能取消尚未发出的请求；已经发出的请求会继续执行到完成或超时，
+        其结果仍会计入源站健康评分和延迟统计。"""
+        policy = self.retry_policy
+        if policy.remaining() <= 0:
+            logging.warning(f"{news_type} 已到截止时间，不再发起请求")
+            return []
+        
+        # 按健康评分排序，最健康的源站作为主站
+        origins = self.router.ranked()
+        cancelled = threading.Event()
+        pool = self.get_hedge_pool(len(origins))
+        # future -> (发出顺序, 源站)
+        pending = {}
+        next_index = 0
+        can_hedge = True
         
+        def launch():
+            nonlocal next_index
+            index, origin = next_index, origins[next_index]
+            next_index += 1
+            pending[pool.submit(self._request_origin, origin, news_type, cancelled)] = (index, origin)
+            return origin
+        
+        def launch_extra():
+            """预算允许时再发出一个请求"""
+            nonlocal can_hedge
+            if not can_hedge or next_index >= len(origins):
+                return None
+            if not policy.take_retry(news_type):
+                can_hedge = False
+                return None
+            return launch()
+        
+        try:
+            launch()
+            while pending:
+                remaining = policy.remaining()
+                if remaining <= 0:
+                    logging.warning(f"{news_type} 已到截止时间，放弃等待")
+                    break
+                # 对冲延迟取最近一个发出请求的源站的延迟分位数
+                last_origin = origins[next_index - 1]
+                delay = self.latency.percentile(last_origin, self.hedge_percentile, self.hedge_default_delay)
+                hedge_possible = can_hedge and next_index < len(origins)
+                timeout = min(delay, remaining) if hedge_possible else remaining
+                done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                
+                if not done:
+                    if hedge_possible and policy.remaining() > 0:
+                        origin = launch_extra()
+                        if origin:
+                            logging.info(f"{news_type} 超过 {delay:.2f}s 未响应，对冲请求 {origin}")
+                    continue
+                
+                for future in done:
+                    index, origin = pending.pop(future)
+                    try:
+                        html_content = future.result()
+                    except Exception as e:
+                        policy.record_attempt(news_type, index, f"{origin} 失败: {str(e)}")
+                        logging.error(f"从 {origin} 获取 {news_type} 失败: {str(e)}")
+                        continue
+                    if html_content:
+                        cancelled.set()
+                        policy.record_attempt(news_type, index, f"{origin} 成功")
+                        results = self.parse_hot_news(html_content, news_type)
+                        logging.info(f"成功从 {origin} 获取 {news_type} {len(results)} 条数据")
+                        return results
+                
+                # 已发出的请求全部失败时立即尝试下一个镜像
+                if not pending:
+                    launch_extra()
+        finally:
+            # 尚未开始的请求直接取消，已开始的请求在 _request_origin 中检查 cancelled 后不再发出
+            cancelled.set()
+            for future in pending:
+                future.cancel()
+        
+        logging.error(f"获取 {news_type} 数据全部源站均失败")
         return []
     
+    def api_parsers(self):
+        """getHotNewsByType 接口各类别的解析函数：(类型, 类别名) -> parse(html_content, data)"""
+        types = {'ths': '热点资讯', 'chaosha': '今日热点', 'jiuyan': '公社热帖', 'timeline': '财经日历'}
+        return {
+            (type_key, type_name): (lambda t: lambda html, data: self.parse_hot_news(html, t))(type_key)
+            for type_key, type_name in types.items()
+        }
+    
     def parse_hot_news(self, html_content, news_type):
         """解析HTML内容，提取热点信息"""
         if not html_content or html_content.strip() == '':
@@ -139,6 +338,17 @@ class HotSpotCrawler:
             return []
             
         try:
+            backend = self.category_backends.get(news_type, self.parser_backend)
+            if backend == 'stream':
+                if news_type in ['ths', 'jiuyan']:
+                    # 流式提取，不构建文档树
+                    items = stream_parser.iter_hot_items(html_content)
+                    rows = extraction_specs.finish_rows('hot_items', items, extraction_specs.HOT_ITEM_DEFAULTS)
+                    return extraction_specs.tag_records(rows, extraction_specs.HOT_ITEM_TYPES[news_type])
+                backend = lxml_parser.DEFAULT_BACKEND
+            if backend == 'lxml':
+                return self._parse_with_specs(html_content, news_type)
+            
             soup = BeautifulSoup(html_content, 'html.parser')
             
             # 处理不同类型的HTML结构
@@ -158,6 +368,35 @@ class HotSpotCrawler:
             logging.error(f"解析HTML内容失败: {e}")
             return []
     
+    def _parse_with_specs(self, html_content, news_type):
+        """使用 extraction_specs 中编译好的规格解析"""
+        crawl_time = lambda: datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        
+        if news_type in ['ths', 'jiuyan']:
+            rows = extraction_specs.extract('hot_items', html_content, extraction_specs.HOT_ITEM_DEFAULTS)
+            return extraction_specs.tag_records(rows, extraction_specs.HOT_ITEM_TYPES[news_type])
+        elif news_type == 'chaosha':
+            return [{
+                'rank': "",
+                'title': block['title'],
+                'link': "",
+                'publish_time': block['date'],
+                'heat': block['heat'],
+                'type': '今日热点',
+                'crawl_time': crawl_time()
+            } for block in extraction_specs.extract('today_hotspot', html_content)]
+        elif news_type == 'timeline':
+            return [{
+                'rank': "",
+                'title': event['event'],
+                'link': "",
+                'publish_time': event['date'],
+                'heat': "",
+                'type': '财经日历',
+                'crawl_time': crawl_time()
+            } for event in extraction_specs.extract('calendar', html_content)]
+        return []
+    
     def _parse_regular_hotspot(self, soup, news_type):
         """解析常规热点资讯"""
         items = soup.find_all('div', class_='item flex')
@@ -309,8 +548,36 @@ class HotSpotCrawler:
         
         return results
     
-    def get_all_hotspots(self):
-        """获取所有类型的热点内容"""
+    def _fetch_category(self, type_key, type_name):
+        """获取单个类别的数据"""
+        logging.info(f"开始获取 {type_name}...")
+        results = self.get_hot_news(type_key)
+        logging.info(f"获取到 {type_name} {len(results)} 条数据")
+        return results
+    
+    def _fetch_all(self, hotspot_types, concurrent, max_workers):
+        """按顺序或在线程池中抓取所有类别，结果按固定顺序返回"""
+        all_results = {}
+        if concurrent:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {
+                    type_name: executor.submit(self._fetch_category, type_key, type_name)
+                    for type_key, type_name in hotspot_types.items()
+                }
+                # 按固定顺序收集结果，保持与顺序模式相同的字典结构
+                for type_name, future in futures.items():
+                    all_results[type_name] = future.result()
+        else:
+            for type_key, type_name in hotspot_types.items():
+                all_results[type_name] = self._fetch_category(type_key, type_name)
+        return all_results
+    
+    def get_all_hotspots(self, concurrent=False, max_workers=4):
+        """获取所有类型的热点内容
+
+        concurrent=True 时在有界线程池中并行抓取各类别，
+        请求频率由按主机的礼貌限速器控制。返回结果与顺序模式完全一致。
+        """
         hotspot_types = {
             'ths': '热点资讯',
             'chaosha': '今日热点', 
@@ -318,14 +585,15 @@ class HotSpotCrawler:
             'timeline': '财经日历'
         }
         
-        all_results = {}
+        # 所有类别共享本次运行的截止时间和重试预算
+        self.retry_policy.start_run()
+        try:
+            all_results = self._fetch_all(hotspot_types, concurrent, max_workers)
+        finally:
+            self.retry_policy.finish_run()
         
-        for type_key, type_name in hotspot_types.items():
-            logging.info(f"开始获取 {type_name}...")
-            results = self.get_hot_news(type_key)
-            all_results[type_name] = results
-            logging.info(f"获取到 {type_name} {len(results)} 条数据")
-            time.sleep(random.uniform(1, 3))  # 随机等待时间，避免请求过于频繁
+        self.router.save()
+        logging.info(f"本次运行重试统计: {self.retry_policy.summary()}")
         
         total_count = sum(len(items) for items in all_results.values())
         logging.info(f"总共获取到 {total_count} 条热点数据")
@@ -386,8 +654,8 @@ def main():
     
     crawler = HotSpotCrawler()
     
-    # 获取所有热点数据
-    all_data = crawler.get_all_hotspots()
+    # 并发获取所有热点数据
+    all_data = crawler.get_all_hotspots(concurrent=True)
     
     # 打印结果
     for category, items in all_data.items():
@@ -6,6 +6,8 @@ import time
 from datetime import datetime
 import logging
 import schedule
+import lxml_parser
+import extraction_specs
 
 # 配置日志
 logging.basicConfig(
@@ -18,10 +20,11 @@ logging.basicConfig(
 )
 
 class AdvancedHotSpotCrawler:
-    def __init__(self):
+    def __init__(self, parser_backend=None):
         self.base_url = "https://duanxianxia.com"
         self.session = requests.Session()
         self.setup_headers()
+        self.parser_backend = lxml_parser.resolve_backend(parser_backend)
         
     def setup_headers(self):
         """设置请求头"""
@@ -76,8 +79,7 @@ class AdvancedHotSpotCrawler:
             response.raise_for_status()
             
             # 从HTML中解析财经日历数据
-            soup = BeautifulSoup(response.text, 'html.parser')
-            timeline_data = self.parse_timeline_from_html(soup)
+            timeline_data = self.parse_timeline_from_html(response.text)
             
             if timeline_data:
                 return timeline_data
@@ -89,28 +91,48 @@ class AdvancedHotSpotCrawler:
             logging.error(f"获取财经日历失败: {str(e)}")
             return []
 
-    def parse_timeline_from_html(self, soup):
-        """从HTML中解析财经日历数据"""
-        # 这里需要根据实际页面结构来解析
-        # 由于页面结构复杂，可能需要更精细的解析
-        timeline_items = []
-        
-        # 尝试查找财经日历相关的元素
-        # 这里只是一个示例，需要根据实际页面调整
-        calendar_elements = soup.find_all('div', class_=re.compile('calendar|timeline'))
+    def parse_timeline_from_html(self, html_content):
+        """从HTML中解析财经日历数据（整页或接口返回的HTML片段）"""
+        if self.parser_backend == 'lxml':
+            events = extraction_specs.extract('timeline', html_content)
+        else:
+            events = extraction_specs.soup_extract('timeline', html_content)
         
-        if not calendar_elements:
-            logging.warning("未找到财经日历元素")
-            return []
+        timeline_items = [{
+            'rank': "",
+            'title': event['event'],
+            'link': "",
+            'publish_time': event['date'],
+            'heat': 0,
+            'type': 'timeline',
+            'crawl_time': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        } for event in events]
         
-        # 具体的解析逻辑需要根据实际HTML结构来写
-        logging.info(f"找到{len(calendar_elements)}个日历元素")
+        logging.info(f"财经日历解析完成，共 {len(timeline_items)} 条记录")
         return timeline_items
     
+    def api_parsers(self):
+        """getHotNewsByType 接口各类别的解析函数：(类型, 类别名) -> parse(html_content, data)
+        
+        财经日历走页面解析（get_timeline_data），不在接口任务之列。
+        """
+        types = {'ths': '热点资讯', 'chaosha': '今日热点', 'jiuyan': '公社热帖', 'ths_hot': '同花热榜'}
+        return {
+            (type_key, type_name): (lambda t: lambda html, data: self.parse_hot_news(html, t))(type_key)
+            for type_key, type_name in types.items()
+        }
+    
     def parse_hot_news(self, html_content, news_type):
         """解析HTML内容"""
         if not html_content:
             return []
+        
+        if self.parser_backend == 'lxml':
+            rows = extraction_specs.extract('hot_items', html_content, extraction_specs.HOT_ITEM_DEFAULTS)
+            return extraction_specs.tag_records(
+                (dict(row, heat=int(row['heat']) if row['heat'].isdigit() else 0) for row in rows),
+                news_type
+            )
             
         soup = BeautifulSoup(html_content, 'html.parser')
         items = soup.find_all('div', class_='item flex')
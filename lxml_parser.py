@@ -0,0 +1,40 @@
+"""
+基于lxml的快速解析后端
+
+直接使用lxml构建文档，文本提取与 BeautifulSoup 的 get_text(strip=True) 保持一致。
+各页面的选择器和字段规则定义在 extraction_specs 中，导入时编译成XPath。
+未安装lxml时 LXML_AVAILABLE 为 False，爬虫类自动退回到 html.parser。
+"""
+
+try:
+    from lxml import etree
+    from lxml import html as lxml_html
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+DEFAULT_BACKEND = 'lxml' if LXML_AVAILABLE else 'html.parser'
+
+if LXML_AVAILABLE:
+    XP_TEXT = etree.XPath('.//text()')
+
+
+def resolve_backend(parser_backend=None):
+    """确定解析后端：默认使用lxml，未安装lxml时退回到 html.parser"""
+    if not parser_backend:
+        return DEFAULT_BACKEND
+    if parser_backend == 'lxml' and not LXML_AVAILABLE:
+        return 'html.parser'
+    return parser_backend
+
+
+def parse_document(html_content):
+    """构建lxml文档，内容为空时返回 None"""
+    if not html_content or not html_content.strip():
+        return None
+    return lxml_html.document_fromstring(html_content)
+
+
+def text_of(element):
+    """等价于 BeautifulSoup 的 get_text(strip=True)"""
+    return ''.join(text.strip() for text in XP_TEXT(element))
@@ -0,0 +1,153 @@
+import os
+import json
+import time
+import logging
+import threading
+from collections import deque
+
+
+class LatencyWindow:
+    """记录每个源站最近若干次请求的耗时，用于计算延迟分位数（线程安全）"""
+
+    def __init__(self, size=50, min_samples=5):
+        self.size = size
+        self.min_samples = min_samples
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, origin, seconds):
+        """记录一次成功请求的耗时"""
+        with self._lock:
+            if origin not in self._samples:
+                self._samples[origin] = deque(maxlen=self.size)
+            self._samples[origin].append(seconds)
+
+    def percentile(self, origin, pct, default=None):
+        """返回该源站耗时的 pct 分位数，样本不足时返回 default"""
+        with self._lock:
+            samples = sorted(self._samples.get(origin, ()))
+        if len(samples) < self.min_samples:
+            return default
+        index = min(len(samples) - 1, int(round(pct / 100.0 * (len(samples) - 1))))
+        return samples[index]
+
+
+class MirrorRouter:
+    """按健康评分选择镜像源站
+
+    为每个源站维护延迟、错误率和空HTML率的指数加权移动平均（EWMA），
+    每次请求选择评分最好的源站；连续失败的源站进入冷却期暂时移出轮换。
+    评分保存在磁盘上，新启动的进程可以直接沿用。
+    """
+
+    def __init__(self, origins, state_file='mirror_health.json', alpha=0.3,
+                 default_latency=1.0, dead_after=3, cooldown=300, save_interval=30):
+        self.origins = list(origins)
+        self.state_file = state_file
+        self.alpha = alpha
+        self.default_latency = default_latency
+        self.dead_after = dead_after
+        self.cooldown = cooldown
+        self.save_interval = save_interval
+        self._health = {origin: self._new_health() for origin in self.origins}
+        self._lock = threading.Lock()
+        self._last_save = 0.0
+        self.load()
+
+    @staticmethod
+    def _new_health():
+        return {
+            'latency': None,
+            'error_rate': 0.0,
+            'empty_rate': 0.0,
+            'failures': 0,
+            'cooldown_until': 0.0,
+            'samples': 0
+        }
+
+    def _ewma(self, old, value):
+        return value if old is None else self.alpha * value + (1 - self.alpha) * old
+
+    def score(self, origin):
+        """评分越低越健康：延迟按错误率和空HTML率加权放大"""
+        health = self._health[origin]
+        latency = health['latency'] if health['latency'] is not None else self.default_latency
+        return latency * (1 + 4 * health['error_rate'] + 2 * health['empty_rate'])
+
+    def ranked(self, exclude=()):
+        """按健康程度排序的可用源站，冷却中的源站排在最后"""
+        now = time.time()
+        with self._lock:
+            candidates = [origin for origin in self.origins if origin not in exclude]
+            return sorted(
+                candidates,
+                key=lambda origin: (self._health[origin]['cooldown_until'] > now,
+                                    self.score(origin),
+                                    self.origins.index(origin))
+            )
+
+    def choose(self, exclude=()):
+        """选择最健康的源站；全部已尝试过时从全体中选择"""
+        ranked = self.ranked(exclude) or self.ranked()
+        return ranked[0]
+
+    def in_cooldown(self, origin):
+        with self._lock:
+            return self._health[origin]['cooldown_until'] > time.time()
+
+    def record(self, origin, latency=None, ok=True, empty=False):
+        """记录一次请求结果：latency 为耗时（秒），ok 表示请求成功，empty 表示返回空HTML"""
+        if origin not in self._health:
+            return
+        with self._lock:
+            health = self._health[origin]
+            health['samples'] += 1
+            if latency is not None:
+                health['latency'] = self._ewma(health['latency'], latency)
+            health['error_rate'] = self._ewma(health['error_rate'], 0.0 if ok else 1.0)
+            if ok:
+                health['empty_rate'] = self._ewma(health['empty_rate'], 1.0 if empty else 0.0)
+            
+            if ok and not empty:
+                health['failures'] = 0
+            else:
+                health['failures'] += 1
+                if health['failures'] >= self.dead_after:
+                    health['cooldown_until'] = time.time() + self.cooldown
+                    health['failures'] = 0
+                    logging.warning(f"源站 {origin} 连续失败，冷却 {self.cooldown} 秒")
+        
+        if time.time() - self._last_save >= self.save_interval:
+            self.save()
+
+    def load(self):
+        """从磁盘读取评分"""
+        if not self.state_file or not os.path.exists(self.state_file):
+            return False
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+            with self._lock:
+                for origin, health in saved.items():
+                    if origin in self._health:
+                        self._health[origin].update(health)
+            return True
+        except (OSError, ValueError) as e:
+            logging.error(f"读取源站评分失败: {e}")
+            return False
+
+    def save(self):
+        """把评分写入磁盘（先写临时文件再替换，避免写出半个文件）"""
+        if not self.state_file:
+            return False
+        try:
+            with self._lock:
+                self._last_save = time.time()
+                tmp_file = f"{self.state_file}.tmp"
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    json.dump(self._health, f, ensure_ascii=False, indent=2)
+                os.replace(tmp_file, self.state_file)
+            return True
+        except OSError as e:
+            logging.error(f"保存源站评分失败: {e}")
+            return False
@@ -0,0 +1,92 @@
+import os
+import json
+import hashlib
+import logging
+from datetime import datetime
+
+
+class PayloadHashStore:
+    """记录每个类别上次处理过的原始payload哈希
+
+    本次抓取到的 html 与上次完全相同时，调用方可以跳过解析、文件输出和数据库导入，
+    只记录一条"无变化"事件。新哈希先暂存，输出成功后再 commit()，
+    避免输出失败时下一次运行误判为无变化。
+    输出文件还要导入数据库时，用 stage_output() 把暂存的哈希和输出文件一起保存，
+    导入成功后再 commit(输出文件)（可以在另一个进程中），导入失败时下次运行会重新处理。
+    """
+
+    def __init__(self, state_file='payload_hashes.json', max_events=100):
+        self.state_file = state_file
+        self.max_events = max_events
+        self.hashes = {}
+        self.events = []
+        self.pending = {}
+        # 输出文件名 -> 等待导入成功后提交的哈希
+        self.staged = {}
+        self.load()
+
+    @staticmethod
+    def digest(html_content):
+        return hashlib.sha256(html_content.encode('utf-8')).hexdigest()
+
+    def is_unchanged(self, category, html_content):
+        return self.hashes.get(category) == self.digest(html_content)
+
+    def stage(self, category, html_content):
+        """暂存新的哈希，commit() 后生效"""
+        self.pending[category] = self.digest(html_content)
+
+    def record_no_change(self, category):
+        """记录一次无变化事件"""
+        event = {
+            'category': category,
+            'event': 'no_change',
+            'time': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
+        self.events.append(event)
+        self.events = self.events[-self.max_events:]
+        logging.info(f"{category} 数据与上次相同，跳过解析和输出")
+
+    def stage_output(self, output_file, max_staged=10):
+        """把暂存的哈希与输出文件关联并保存，等输出文件导入成功后再提交"""
+        self.staged[os.path.basename(output_file)] = self.pending
+        self.pending = {}
+        # 只保留最近几次未导入的输出
+        for name in list(self.staged)[:-max_staged]:
+            del self.staged[name]
+        return self.save()
+
+    def commit(self, output_file=None):
+        """提交暂存的哈希并保存；指定输出文件时提交与该文件关联的哈希"""
+        if output_file is None:
+            self.hashes.update(self.pending)
+            self.pending = {}
+        else:
+            self.hashes.update(self.staged.pop(os.path.basename(output_file), {}))
+        return self.save()
+
+    def load(self):
+        if not os.path.exists(self.state_file):
+            return False
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            self.hashes = state.get('hashes', {})
+            self.events = state.get('events', [])
+            self.staged = state.get('staged', {})
+            return True
+        except (OSError, ValueError) as e:
+            logging.error(f"读取payload哈希失败: {e}")
+            return False
+
+    def save(self):
+        try:
+            tmp_file = f"{self.state_file}.tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump({'hashes': self.hashes, 'events': self.events, 'staged': self.staged},
+                          f, ensure_ascii=False, indent=2)
+            os.replace(tmp_file, self.state_file)
+            return True
+        except OSError as e:
+            logging.error(f"保存payload哈希失败: {e}")
+            return False
@@ -0,0 +1,35 @@
+import threading
+import time
+import random
+from urllib.parse import urlparse
+
+
+class HostPolitenessLimiter:
+    """按主机限制请求间隔的礼貌限速器（线程安全）
+
+    同一主机的两次请求之间至少间隔 min_interval 秒（外加随机抖动），
+    不同主机互不影响。用于替代请求之间固定的 time.sleep。
+    """
+
+    def __init__(self, min_interval=0.3, jitter=0.2):
+        self.min_interval = min_interval
+        self.jitter = jitter
+        self._next_allowed = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def host_of(url):
+        """提取URL中的主机名"""
+        return urlparse(url).netloc or url
+
+    def acquire(self, url):
+        """为该主机预约下一个请求时隙，必要时阻塞等待，返回等待秒数"""
+        host = self.host_of(url)
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_allowed.get(host, now))
+            self._next_allowed[host] = slot + self.min_interval + random.uniform(0, self.jitter)
+        wait = slot - now
+        if wait > 0:
+            time.sleep(wait)
+        return wait
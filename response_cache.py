@@ -0,0 +1,152 @@
+import gzip
+import logging
+import threading
+from collections import OrderedDict
+
+# brotli 为可选依赖，未安装时只生成 gzip 版本
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+# 客户端同时接受时优先使用的压缩格式
+ENCODING_PREFERENCE = ('br', 'gzip')
+
+
+def compress_variants(body):
+    """生成响应体的原始、gzip 和 brotli（已安装时）版本"""
+    variants = {'identity': body, 'gzip': gzip.compress(body, compresslevel=9, mtime=0)}
+    if BROTLI_AVAILABLE:
+        variants['br'] = brotli.compress(body, quality=11)
+    return variants
+
+
+class ResponseCache:
+    """按数据代数失效的LRU响应缓存（线程安全）
+
+    缓存序列化好的响应体，最多保留 max_entries 条，超出时淘汰最久未使用的一条。
+    数据代数变化（有新的导入或清理）时整体清空，不会返回旧数据。
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.generation = None
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _check_generation(self, generation):
+        if generation != self.generation:
+            self._entries.clear()
+            self.generation = generation
+
+    def get(self, key, generation):
+        """返回该代数下缓存的值，没有时返回 None"""
+        with self._lock:
+            self._check_generation(generation)
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, generation, value):
+        """缓存一个值；生成期间数据代数已变化的结果不缓存"""
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """缓存命中统计"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'generation': self.generation,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+class PublishedResponses:
+    """每个数据代数只渲染一次的常用响应（线程安全）
+
+    数据代数变化后在后台线程中用 render 渲染 keys 中的每个请求，
+    把响应体和压缩版本保存为字节串；发布完成前 get 返回 None，请求走正常路径。
+    render(key) 返回 (响应体, mimetype)，不可发布时返回 None。
+    """
+
+    def __init__(self, render, keys, get_generation):
+        self.render = render
+        self.keys = list(keys)
+        self.get_generation = get_generation
+        self.generation = None
+        self._payloads = {}
+        self._publishing = False
+        self._lock = threading.Lock()
+
+    def get(self, key, generation):
+        """返回已发布的 (各编码版本, mimetype)，没有时返回 None"""
+        with self._lock:
+            if generation != self.generation:
+                return None
+            return self._payloads.get(key)
+
+    def ensure(self, generation):
+        """发布的版本落后于当前数据代数时，在后台线程中重新发布"""
+        with self._lock:
+            if generation == self.generation or self._publishing:
+                return
+            self._publishing = True
+        threading.Thread(target=self._publish_loop, daemon=True).start()
+
+    def _publish_loop(self):
+        try:
+            while True:
+                generation = self.get_generation()
+                if generation is None:
+                    return
+                payloads = self.publish_all()
+                # 渲染期间又有新数据导入时重新发布，保证内容与代数一致
+                if self.get_generation() != generation:
+                    continue
+                with self._lock:
+                    self._payloads = payloads
+                    self.generation = generation
+                logging.info(f"已发布数据代数 {generation} 的 {len(payloads)} 个响应")
+                return
+        except Exception as e:
+            logging.error(f"发布响应失败: {e}")
+        finally:
+            with self._lock:
+                self._publishing = False
+
+    def publish_all(self):
+        """渲染并压缩所有常用响应"""
+        payloads = {}
+        for key in self.keys:
+            rendered = self.render(key)
+            if rendered is not None:
+                body, mimetype = rendered
+                payloads[key] = (compress_variants(body), mimetype)
+        return payloads
+
+
+def choose_encoding(accept_encodings, variants):
+    """按客户端的 Accept-Encoding 选择压缩格式，都不接受时返回 identity"""
+    for encoding in ENCODING_PREFERENCE:
+        if encoding in variants and accept_encodings[encoding]:
+            return encoding
+    return 'identity'
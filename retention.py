@@ -0,0 +1,185 @@
+"""
+数据保留与归档
+
+按表配置保留天数：超过保留期（last_seen 早于截止时间）的数据分批导出到
+gzip 压缩的 JSON Lines 归档文件，再按小批次删除，每批一个短事务，
+导入和读取都不会被长时间阻塞。各类别最新快照中的数据始终保留。
+删除后用 incremental_vacuum 分步归还空闲页，数据库文件大小保持稳定。
+"""
+
+import os
+import sys
+import gzip
+import json
+import time
+import sqlite3
+import logging
+from datetime import datetime, timedelta
+
+from database_manager import DatabaseManager
+
+# 配置日志
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+# 各表默认保留天数
+RETENTION_DAYS = {
+    'hot_news': 90,
+    'today_hotspot': 90,
+    'financial_calendar': 365,
+    'crawl_runs': 180
+}
+
+# 过期数据：不在任何类别的最新快照中，且最近一次抓取早于截止时间
+EXPIRED_SQL = {
+    table: f'''
+        SELECT * FROM {table}
+        WHERE last_seen < ? AND coalesce(run_id, -1) NOT IN (SELECT run_id FROM latest_runs)
+        ORDER BY last_seen, id LIMIT ?
+    ''' for table in ('hot_news', 'today_hotspot', 'financial_calendar')
+}
+# 过期批次：已经没有数据行引用、也不是任何类别的最新批次
+EXPIRED_SQL['crawl_runs'] = '''
+    SELECT * FROM crawl_runs
+    WHERE imported_at < ?
+      AND id NOT IN (SELECT run_id FROM latest_runs)
+      AND NOT EXISTS (SELECT 1 FROM hot_news WHERE run_id = crawl_runs.id)
+      AND NOT EXISTS (SELECT 1 FROM today_hotspot WHERE run_id = crawl_runs.id)
+      AND NOT EXISTS (SELECT 1 FROM financial_calendar WHERE run_id = crawl_runs.id)
+    ORDER BY id LIMIT ?
+'''
+
+
+class RetentionManager:
+    """过期数据归档、分批删除和增量回收空间"""
+
+    def __init__(self, db_manager, retention_days=None, archive_dir='archive',
+                 batch_size=1000, delete_chunk=200, vacuum_pages=500, pause=0.01):
+        self.db_manager = db_manager
+        self.retention_days = dict(RETENTION_DAYS, **(retention_days or {}))
+        self.archive_dir = archive_dir
+        self.batch_size = batch_size
+        self.delete_chunk = delete_chunk
+        self.vacuum_pages = vacuum_pages
+        self.pause = pause
+
+    def enable_incremental_vacuum(self):
+        """已有数据库切换到 auto_vacuum=INCREMENTAL（需要一次完整 VACUUM），新库由 SQLitePool 在建表前设置"""
+        with self.db_manager.pool.connection() as conn:
+            if conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 2:
+                return False
+            logging.info("切换到增量回收模式，执行一次完整 VACUUM...")
+            conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            conn.execute('VACUUM')
+            return True
+
+    def _cutoff(self, table, now):
+        cutoff = now - timedelta(days=self.retention_days[table])
+        return cutoff.strftime("%Y-%m-%d %H:%M:%S")
+
+    def expire_table(self, table, now=None):
+        """归档并删除一张表的过期数据，返回归档条数和归档文件"""
+        cutoff = self._cutoff(table, now or datetime.now())
+        archive_file = None
+        archived = 0
+        writer = None
+        try:
+            while True:
+                with self.db_manager.pool.connection() as conn:
+                    rows = [dict(row) for row in conn.execute(EXPIRED_SQL[table], (cutoff, self.batch_size))]
+                if not rows:
+                    break
+
+                # 先写入归档并落盘，再删除
+                if writer is None:
+                    os.makedirs(self.archive_dir, exist_ok=True)
+                    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                    archive_file = os.path.join(self.archive_dir, f"{table}_{stamp}.jsonl.gz")
+                    writer = gzip.open(archive_file, 'wt', encoding='utf-8')
+                for row in rows:
+                    writer.write(json.dumps(row, ensure_ascii=False) + '\n')
+                writer.flush()
+
+                self._delete_ids(table, [row['id'] for row in rows])
+                archived += len(rows)
+        finally:
+            if writer is not None:
+                writer.close()
+
+        if archived:
+            logging.info(f"{table}: 归档并删除 {archived} 条早于 {cutoff} 的数据 -> {archive_file}")
+        return {'archived': archived, 'file': archive_file}
+
+    def _delete_ids(self, table, ids):
+        """按小批次删除，每批一个短事务"""
+        for start in range(0, len(ids), self.delete_chunk):
+            chunk = ids[start:start + self.delete_chunk]
+            with self.db_manager.pool.connection() as conn:
+                with conn:
+                    conn.execute(f"DELETE FROM {table} WHERE id IN ({', '.join('?' * len(chunk))})", chunk)
+                    self.db_manager.bump_generation(conn)
+            if self.pause:
+                time.sleep(self.pause)
+
+    def incremental_vacuum(self):
+        """分步归还空闲页，每步只回收 vacuum_pages 页，返回回收的页数"""
+        freed = 0
+        while True:
+            with self.db_manager.pool.connection() as conn:
+                free_pages = conn.execute('PRAGMA freelist_count').fetchone()[0]
+                if free_pages == 0:
+                    break
+                conn.execute(f'PRAGMA incremental_vacuum({int(self.vacuum_pages)})').fetchall()
+                remaining = conn.execute('PRAGMA freelist_count').fetchone()[0]
+            if remaining >= free_pages:
+                # 未开启增量回收模式时 incremental_vacuum 不起作用
+                break
+            freed += free_pages - remaining
+            if self.pause:
+                time.sleep(self.pause)
+        if freed:
+            logging.info(f"增量回收 {freed} 个空闲页")
+        return freed
+
+    def run(self, now=None):
+        """执行一次完整的保留任务：数据表 -> 抓取批次 -> 回收空间"""
+        now = now or datetime.now()
+        summary = {}
+        try:
+            self.enable_incremental_vacuum()
+            # 数据行引用批次，先清数据表再清批次
+            for table in ('hot_news', 'today_hotspot', 'financial_calendar', 'crawl_runs'):
+                summary[table] = self.expire_table(table, now)
+            summary['freed_pages'] = self.incremental_vacuum()
+        except (sqlite3.Error, OSError) as e:
+            logging.error(f"数据保留任务失败: {e}")
+            return None
+        return summary
+
+
+def main():
+    """主函数：python retention.py [表名=天数 ...]"""
+    retention_days = {}
+    for arg in sys.argv[1:]:
+        table, _, days = arg.partition('=')
+        if table not in RETENTION_DAYS or not days.isdigit():
+            print(f"无效参数: {arg}，格式为 表名=天数，表名可选 {', '.join(RETENTION_DAYS)}")
+            return False
+        retention_days[table] = int(days)
+
+    db_manager = DatabaseManager()
+    summary = RetentionManager(db_manager, retention_days).run()
+    db_manager.close()
+    if summary is None:
+        return False
+
+    for table in RETENTION_DAYS:
+        print(f"{table}: 归档 {summary[table]['archived']} 条")
+    print(f"回收空闲页: {summary['freed_pages']}")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
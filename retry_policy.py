@@ -0,0 +1,125 @@
+import time
+import random
+import logging
+import threading
+from contextlib import contextmanager
+
+
+class RetryPolicy:
+    """统一的重试策略
+
+    一次抓取运行共享一个截止时间和一个全局重试预算：
+    - 每个类别最多尝试 max_attempts 次
+    - 所有类别加起来最多重试 retry_budget 次
+    - 超过 deadline 秒后不再发起新的请求
+    - 重试之间使用带抖动的指数退避（full jitter）
+    每次尝试都会记录在预算上，运行的最坏耗时因此有明确上界。
+    不在一次运行中的单独调用（call_scope）各自使用新的截止时间和预算。
+    """
+
+    def __init__(self, max_attempts=3, retry_budget=4, deadline=60.0,
+                 base_delay=0.5, max_delay=4.0, request_timeout=15):
+        self.max_attempts = max_attempts
+        self.retry_budget = retry_budget
+        self.deadline = deadline
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.request_timeout = request_timeout
+        self._lock = threading.Lock()
+        self.running = False
+        self._reset()
+
+    def _reset(self):
+        self.started = time.monotonic()
+        self.retries_left = self.retry_budget
+        self.attempts = []
+
+    def start_run(self):
+        """开始新的一次运行：重置截止时间和重试预算"""
+        with self._lock:
+            self._reset()
+            self.running = True
+
+    def finish_run(self):
+        """结束当前运行，之后的单独调用重新计时"""
+        with self._lock:
+            self.running = False
+
+    @contextmanager
+    def call_scope(self):
+        """单独调用（不在 start_run 开始的运行中）时，为这次调用开始新的截止时间和预算"""
+        with self._lock:
+            own_run = not self.running
+            if own_run:
+                self._reset()
+                self.running = True
+        try:
+            yield
+        finally:
+            if own_run:
+                self.finish_run()
+
+    def remaining(self):
+        """本次运行剩余的时间（秒）"""
+        return max(0.0, self.deadline - (time.monotonic() - self.started))
+
+    def timeout_for_request(self):
+        """单次请求的超时：不超过 request_timeout，也不超过剩余时间"""
+        return min(self.request_timeout, self.remaining())
+
+    def backoff(self, attempt):
+        """第 attempt 次失败后的等待时间（full jitter）"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def record_attempt(self, category, attempt, outcome):
+        """把一次尝试记在预算上"""
+        with self._lock:
+            self.attempts.append({
+                'category': category,
+                'attempt': attempt + 1,
+                'outcome': outcome,
+                'elapsed': round(time.monotonic() - self.started, 3)
+            })
+            retries_left = self.retries_left
+        logging.info(f"[重试策略] {category} 第 {attempt + 1} 次尝试: {outcome} "
+                     f"(剩余重试预算 {retries_left}, 剩余时间 {self.remaining():.1f}s)")
+
+    def take_retry(self, category):
+        """从全局预算中扣除一次额外请求（对冲请求也计入），预算或时间用完时返回 False"""
+        if self.remaining() <= 0:
+            logging.warning(f"[重试策略] 已到截止时间，{category} 不再发起请求")
+            return False
+        with self._lock:
+            if self.retries_left <= 0:
+                logging.warning(f"[重试策略] 全局重试预算已用完，{category} 不再发起请求")
+                return False
+            self.retries_left -= 1
+        return True
+
+    def next_delay(self, category, attempt, max_attempts=None):
+        """第 attempt 次尝试失败后，返回重试前应等待的秒数；不应再重试时返回 None"""
+        max_attempts = max_attempts or self.max_attempts
+        if attempt + 1 >= max_attempts:
+            logging.warning(f"[重试策略] {category} 已达到最大尝试次数 {max_attempts}")
+            return None
+
+        delay = self.backoff(attempt)
+        if delay >= self.remaining():
+            logging.warning(f"[重试策略] {category} 剩余时间不足，放弃重试")
+            return None
+
+        with self._lock:
+            if self.retries_left <= 0:
+                logging.warning(f"[重试策略] 全局重试预算已用完，{category} 不再重试")
+                return None
+            self.retries_left -= 1
+        return delay
+
+    def summary(self):
+        """本次运行的尝试统计"""
+        with self._lock:
+            return {
+                'attempts': len(self.attempts),
+                'retries_used': self.retry_budget - self.retries_left,
+                'elapsed': round(time.monotonic() - self.started, 3)
+            }
@@ -1,8 +1,11 @@
+import os
+import glob
 import time
 import schedule
 import subprocess
 import logging
 from datetime import datetime
+from payload_hash import PayloadHashStore
 
 # 配置日志
 logging.basicConfig(
@@ -18,6 +21,7 @@ def run_crawler():
     """运行爬虫任务"""
     try:
         logging.info("开始执行定时爬虫任务...")
+        started = time.time()
         
         # 1. 运行爬虫
         result = subprocess.run(['python', 'complete_hotspot_crawler.py'], 
@@ -25,13 +29,22 @@ def run_crawler():
         if result.returncode == 0:
             logging.info("爬虫执行成功")
             
+            # 本次运行没有写出新文件说明所有类别数据均无变化
+            new_files = [f for f in glob.glob("complete_hotspot_data_*.json") if os.path.getmtime(f) >= started]
+            if not new_files:
+                logging.info("数据无变化，跳过数据库导入")
+                return
+            json_file = max(new_files, key=os.path.getmtime)
+            
             # 2. 导入数据到数据库
             import_result = subprocess.run(['python', '-c', 
-                                          'import database_manager; db = database_manager.DatabaseManager(); '
-                                          'db.import_from_json(\"complete_hotspot_data_\" + __import__(\"datetime\").datetime.now().strftime(\"%Y%m%d_%H%M%S\") + \".json\")'],
+                                          'import sys, database_manager; db = database_manager.DatabaseManager(); '
+                                          'sys.exit(0 if db.import_from_json(sys.argv[1]) else 1)', json_file],
                                          capture_output=True, text=True, cwd='.')
             if import_result.returncode == 0:
                 logging.info("数据导入数据库成功")
+                # 导入成功后才提交payload哈希，导入失败时下次运行不会把这些类别当作无变化
+                PayloadHashStore().commit(json_file)
             else:
                 logging.error(f"数据导入失败: {import_result.stderr}")
                 
@@ -41,6 +54,19 @@ def run_crawler():
     except Exception as e:
         logging.error(f"定时任务执行异常: {str(e)}")
 
+def run_retention():
+    """归档并清理过期数据，增量回收数据库空间"""
+    try:
+        logging.info("开始执行数据保留任务...")
+        result = subprocess.run(['python', 'retention.py'], capture_output=True, text=True, cwd='.')
+        if result.returncode == 0:
+            logging.info(f"数据保留任务完成\n{result.stdout.strip()}")
+        else:
+            logging.error(f"数据保留任务失败: {result.stderr}")
+            
+    except Exception as e:
+        logging.error(f"数据保留任务执行异常: {str(e)}")
+
 def main():
     """主函数"""
     logging.info("定时任务调度器启动")
@@ -48,6 +74,9 @@ def main():
     # 每30分钟执行一次
     schedule.every(30).minutes.do(run_crawler)
     
+    # 每天凌晨清理一次过期数据
+    schedule.every().day.at("03:30").do(run_retention)
+    
     # 立即执行一次
     run_crawler()
     
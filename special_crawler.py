@@ -5,6 +5,8 @@ from bs4 import BeautifulSoup
 import time
 from datetime import datetime
 import logging
+import lxml_parser
+import extraction_specs
 
 # 配置日志
 logging.basicConfig(
@@ -13,10 +15,11 @@ logging.basicConfig(
 )
 
 class SpecialHotSpotCrawler:
-    def __init__(self):
+    def __init__(self, parser_backend=None):
         self.base_url = "https://duanxianxia.com"
         self.session = requests.Session()
         self.setup_headers()
+        self.parser_backend = lxml_parser.resolve_backend(parser_backend)
         
     def setup_headers(self):
         """设置请求头"""
@@ -60,94 +63,23 @@ class SpecialHotSpotCrawler:
             return []
 
     def parse_today_hotspot_from_html(self, html_content):
-        """从HTML内容解析今日热点"""
-        soup = BeautifulSoup(html_content, 'html.parser')
-        results = []
-        
-        try:
-            # 解析今日热点面板
-            chaosha_panel = soup.find('div', id='chaosha')
-            if not chaosha_panel:
-                logging.warning("未找到今日热点面板")
-                return []
-            
-            # 解析日期
-            date_div = chaosha_panel.find('div', class_='panel-heading')
-            date_text = date_div.get_text(strip=True) if date_div else ""
-            
-            # 解析关键词和热度
-            info_div = chaosha_panel.find('div', style="color:#999;")
-            if info_div:
-                keyword_text = info_div.get_text(strip=True)
-            else:
-                keyword_text = ""
-            
-            # 解析热点标题
-            keyword_div = chaosha_panel.find('div', class_='keyword')
-            if keyword_div:
-                title_b = keyword_div.find('b')
-                title = title_b.get_text(strip=True) if title_b else keyword_div.get_text(strip=True)
-                
-                result = {
-                    'date': date_text,
-                    'keywords': keyword_text,
-                    'title': title,
-                    'type': '今日热点',
-                    'crawl_time': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                }
-                results.append(result)
-            else:
-                logging.warning("未找到今日热点标题")
-                
-        except Exception as e:
-            logging.error(f"解析今日热点失败: {e}")
-        
-        return results
-    
-    def parse_today_hotspot(self, soup):
-        """解析今日热点数据"""
-        results = []
-        
-        # 根据用户提供的HTML结构解析今日热点
+        """从HTML内容解析今日热点（整页或接口返回的HTML片段）"""
         try:
-            # 查找今日热点面板
-            chaosha_panel = soup.find('div', id='chaosha')
-            if not chaosha_panel:
-                logging.warning("未找到今日热点面板")
-                return []
-            
-            # 解析日期
-            date_div = chaosha_panel.find('div', class_='panel-heading')
-            date_text = date_div.get_text(strip=True) if date_div else ""
-            
-            # 解析关键词和热度
-            info_div = chaosha_panel.find('div', style="color:#999;")
-            if info_div:
-                keyword_text = info_div.get_text(strip=True)
+            if self.parser_backend == 'lxml':
+                blocks = extraction_specs.extract('chaosha', html_content)
             else:
-                keyword_text = ""
-            
-            # 解析热点标题
-            keyword_div = chaosha_panel.find('div', class_='keyword')
-            if keyword_div:
-                title_b = keyword_div.find('b')
-                title = title_b.get_text(strip=True) if title_b else keyword_div.get_text(strip=True)
-                
-                result = {
-                    'date': date_text,
-                    'keywords': keyword_text,
-                    'title': title,
-                    'type': '今日热点',
-                    'crawl_time': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                }
-                results.append(result)
-            else:
-                logging.warning("未找到今日热点标题")
-                
+                blocks = extraction_specs.soup_extract('chaosha', html_content)
+            return [{
+                'date': block['date'],
+                'keywords': block['keywords'],
+                'title': block['title'],
+                'heat': block['heat'],
+                'type': '今日热点',
+                'crawl_time': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            } for block in blocks]
         except Exception as e:
             logging.error(f"解析今日热点失败: {e}")
-        
-        return results
+            return []
 
     def parse_calendar(self, soup):
         """解析财经日历数据"""
@@ -224,6 +156,16 @@ class SpecialHotSpotCrawler:
 
     def parse_calendar_from_html(self, html_content, cdate):
         """从HTML内容解析财经日历"""
+        if self.parser_backend == 'lxml':
+            results = [{
+                'date': event['date'],
+                'event': event['event'],
+                'type': '财经日历',
+                'crawl_time': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            } for event in extraction_specs.extract('calendar', html_content)]
+            logging.info(f"财经日历解析完成，共 {len(results)} 条记录")
+            return results
+        
         soup = BeautifulSoup(html_content, 'html.parser')
         results = []
         
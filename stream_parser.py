@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+热点资讯/公社热帖列表的单遍流式提取器
+
+基于标准库 html.parser 的事件回调，一次扫描HTML，
+每遇到一个完整的 div.item.flex 就产出一条记录，不构建整棵文档树，
+内存占用与页面大小无关。选择规则与 extraction_specs 中的 hot_items 规格一致，
+产出原始字段（元素不存在的字段为 None），转换和默认值由 extraction_specs.finish_rows 统一处理。
+"""
+
+import re
+from html.parser import HTMLParser
+
+HEAT_PATTERN = re.compile(r'热度：\d+')
+HEAT_STYLE = 'width:90px;display:inline-block;'
+
+# 没有结束标签的元素
+VOID_TAGS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+    'link', 'meta', 'param', 'source', 'track', 'wbr'
+}
+
+
+class _Frame:
+    """条目内一个打开的元素：累加 get_text(strip=True) 的文本，并模拟 tag.string"""
+
+    def __init__(self, tag, kind=None, order=0):
+        self.tag = tag
+        self.kind = kind
+        self.order = order
+        self.texts = []
+        self.children = 0
+        self.own_string = None
+        self.child_string = None
+
+    def text(self):
+        return ''.join(self.texts)
+
+    def string(self):
+        # 与 BeautifulSoup 一致：只有一个子节点时才有 .string
+        if self.children != 1:
+            return None
+        return self.own_string if self.own_string is not None else self.child_string
+
+
+class StreamingHotItemParser(HTMLParser):
+    """流式解析 div.item.flex 列表"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.ready = []
+        self._pending_data = []
+        self._reset_item()
+
+    def _reset_item(self):
+        self.item = None
+        self.frames = []
+        self._span_order = 0
+        self._heat_candidates = []
+
+    @staticmethod
+    def _has_class(attrs, name):
+        return name in (attrs.get('class') or '').split()
+
+    def _open(self, kind):
+        return any(frame.kind == kind for frame in self.frames)
+
+    def handle_starttag(self, tag, attrs):
+        self._flush_data()
+        attrs = dict(attrs)
+        if self.item is None:
+            if tag == 'div' and attrs.get('class') == 'item flex':
+                self.item = {'rank': None, 'title': None, 'link': None, 'publish_time': None, 'heat': None}
+            return
+
+        if self.frames:
+            self.frames[-1].children += 1
+        if tag in VOID_TAGS:
+            return
+
+        kind = None
+        order = 0
+        if tag == 'div' and self._has_class(attrs, 'no') and self.item['rank'] is None \
+                and not self._open('rank'):
+            kind = 'rank'
+        elif tag == 'a' and self.item['title'] is None and not self._open('title'):
+            kind = 'title'
+            self.item['link'] = attrs.get('href', '') or ''
+        elif tag == 'span':
+            if self._has_class(attrs, 'time') and self.item['publish_time'] is None \
+                    and not self._open('publish_time'):
+                kind = 'publish_time'
+            elif attrs.get('style') == HEAT_STYLE and self.item['heat'] is None and not self._open('heat'):
+                kind = 'heat'
+            self._span_order += 1
+            order = self._span_order
+        self.frames.append(_Frame(tag, kind, order))
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        self._flush_data()
+        if self.item is None or tag in VOID_TAGS:
+            return
+        if any(frame.tag == tag for frame in self.frames):
+            # 与 html.parser 树构建器相同：关闭到最近的同名元素为止
+            while True:
+                frame = self._close_frame()
+                if frame.tag == tag:
+                    break
+        elif tag == 'div':
+            self._finish_item()
+
+    def _close_frame(self):
+        frame = self.frames.pop()
+        text = frame.text()
+        string = frame.string()
+
+        # 文本向外层累加，.string 向父元素传递
+        if self.frames:
+            parent = self.frames[-1]
+            if text:
+                parent.texts.append(text)
+            parent.child_string = string
+
+        if frame.kind == 'rank':
+            self.item['rank'] = text
+        elif frame.kind == 'title':
+            self.item['title'] = text
+        elif frame.kind == 'publish_time':
+            self.item['publish_time'] = text
+        elif frame.kind == 'heat':
+            self.item['heat'] = text
+
+        if frame.tag == 'span' and string is not None and HEAT_PATTERN.search(string):
+            self._heat_candidates.append((frame.order, text))
+        return frame
+
+    def handle_data(self, data):
+        # 分块喂入时同一段文本可能被拆成多次回调，合并后再处理
+        if self.item is not None and self.frames:
+            self._pending_data.append(data)
+
+    def _flush_data(self):
+        if not self._pending_data:
+            return
+        data = ''.join(self._pending_data)
+        self._pending_data = []
+        frame = self.frames[-1]
+        frame.children += 1
+        frame.own_string = data
+        stripped = data.strip()
+        if stripped:
+            frame.texts.append(stripped)
+
+    def handle_comment(self, data):
+        self._flush_data()
+        if self.item is not None and self.frames:
+            self.frames[-1].children += 1
+
+    def _finish_item(self):
+        while self.frames:
+            self._close_frame()
+        if self.item['heat'] is None and self._heat_candidates:
+            # 没有固定宽度的热度span时，取文档顺序中第一个文本匹配的span
+            self.item['heat'] = min(self._heat_candidates)[1]
+        self.ready.append(self.item)
+        self._reset_item()
+
+    def close(self):
+        super().close()
+        self._flush_data()
+        if self.item is not None:
+            self._finish_item()
+
+    def drain(self):
+        """取出已经完整解析的记录"""
+        records, self.ready = self.ready, []
+        return records
+
+
+def iter_hot_items(chunks):
+    """逐块喂入HTML，每解析完一条就产出一条"""
+    if isinstance(chunks, str):
+        chunks = [chunks]
+    parser = StreamingHotItemParser()
+    for chunk in chunks:
+        parser.feed(chunk)
+        yield from parser.drain()
+    parser.close()
+    yield from parser.drain()
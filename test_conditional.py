@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+条件请求测试 - If-None-Match / If-Modified-Since 命中时返回304，数据导入后重新返回200
+"""
+
+import sys
+import logging
+import importlib
+
+import pytest
+
+from database_manager import DatabaseManager
+
+ROWS = [
+    {'rank': '1', 'title': '国产AI芯片亮剑', 'link': 'a', 'publish_time': '2025-09-17',
+     'heat': '热度：100', 'type': '热点资讯', 'crawl_time': '2025-09-17 10:00:00'},
+]
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    """在临时目录中加载 api_server，使用其中新建的 hotspot_data.db，返回 (测试客户端, 写入用的数据库)"""
+    monkeypatch.chdir(tmp_path)
+    logging.disable(logging.INFO)
+    sys.modules.pop('api_server', None)
+    api_server = importlib.import_module('api_server')
+    writer = DatabaseManager(str(tmp_path / 'hotspot_data.db'))
+    try:
+        writer.bulk_import({'热点资讯': ROWS})
+        yield api_server.app.test_client(), writer
+    finally:
+        # 后台发布线程可能仍在读取，api_server 的连接随模块一起回收，不在这里关闭
+        writer.close()
+        sys.modules.pop('api_server', None)
+        logging.disable(logging.NOTSET)
+
+
+@pytest.mark.parametrize('path', ['/api/hot_news?limit=5', '/api/snapshot'])
+def test_not_modified(server, path):
+    client, writer = server
+    first = client.get(path)
+    assert first.status_code == 200
+    etag, last_modified = first.headers['ETag'], first.headers['Last-Modified']
+
+    assert client.get(path, headers={'If-None-Match': etag}).status_code == 304
+    assert client.get(path, headers={'If-Modified-Since': last_modified}).status_code == 304
+    assert client.get(path, headers={'If-Modified-Since': 'Mon, 01 Jan 2001 00:00:00 GMT'}).status_code == 200
+
+    # 导入新数据后数据代数变化，旧的ETag不再命中
+    writer.bulk_import({'热点资讯': [dict(ROWS[0], title='黄金再创纪录', link='b')]})
+    changed = client.get(path, headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+日期面板解析回归测试 - html.parser 后端与lxml后端在保存的接口响应和整页上输出相同
+"""
+
+import os
+import json
+import logging
+
+import pytest
+
+import lxml_parser
+from special_crawler import SpecialHotSpotCrawler
+from hotspot_crawler_advanced import AdvancedHotSpotCrawler
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+PARSERS = {
+    'chaosha': lambda backend, html: SpecialHotSpotCrawler(parser_backend=backend).parse_today_hotspot_from_html(html),
+    'timeline': lambda backend, html: AdvancedHotSpotCrawler(parser_backend=backend).parse_timeline_from_html(html),
+}
+
+
+def load_fixture(news_type):
+    with open(os.path.join(FIXTURE_DIR, f'{news_type}.json'), 'r', encoding='utf-8') as f:
+        return json.load(f)['html']
+
+
+def strip_time(records):
+    return [{k: v for k, v in record.items() if k != 'crawl_time'} for record in records]
+
+
+@pytest.mark.skipif(not lxml_parser.LXML_AVAILABLE, reason='需要lxml')
+@pytest.mark.parametrize('news_type', ['chaosha', 'timeline'])
+@pytest.mark.parametrize('page', [False, True])
+def test_html_parser_matches_lxml(news_type, page):
+    """接口返回的日期面板和整页中的 #chaosha / #timeline 面板两种后端结果相同"""
+    html_content = load_fixture(news_type)
+    if page:
+        html_content = (f'<html><body><div class="panel panel-danger"><div class="panel-heading">其他</div></div>'
+                        f'<div id="{news_type}">{html_content}</div></body></html>')
+    logging.disable(logging.INFO)
+    try:
+        soup = PARSERS[news_type]('html.parser', html_content)
+        lxml = PARSERS[news_type]('lxml', html_content)
+    finally:
+        logging.disable(logging.NOTSET)
+    assert soup
+    assert strip_time(soup) == strip_time(lxml)
@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""
+热度解析测试 - 带前缀、千分位和万/亿单位的热度文本解析成整数
+"""
+
+import pytest
+
+from database_manager import parse_heat
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('12345', 12345),
+    ('热度：12,345', 12345),
+    ('热度值：2万', 20000),
+    ('85.3万', 853000),
+    ('1.2亿', 120000000),
+    ('1,234.5万', 12345000),
+    ('热度 3.6 万', 36000),
+    (678, 678),
+    (1.5, 1),
+    ('', None),
+    ('暂无', None),
+    (None, None),
+])
+def test_parse_heat(text, expected):
+    assert parse_heat(text) == expected
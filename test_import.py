@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+导入测试 - HotSpotCrawler 输出的今日热点和财经日历按各自的日期和标题去重，返回的条数为实际存储的行数
+"""
+
+import os
+import json
+import logging
+import tempfile
+
+from database_manager import DatabaseManager
+from hotspot_crawler import HotSpotCrawler
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def crawl(news_type):
+    """用 HotSpotCrawler 解析保存的接口响应"""
+    with open(os.path.join(FIXTURE_DIR, f'{news_type}.json'), 'r', encoding='utf-8') as f:
+        html_content = json.load(f)['html']
+    return HotSpotCrawler().parse_hot_news(html_content, news_type)
+
+
+def test_crawler_records_keep_their_natural_keys():
+    """日期在 publish_time、事件在 title 的记录不会合并成一行"""
+    logging.disable(logging.INFO)
+    try:
+        data = {'今日热点': crawl('chaosha'), '财经日历': crawl('timeline')}
+        # 缺少标题的记录会得到空的自然键，不写入
+        data['财经日历'].append(dict(data['财经日历'][0], title=''))
+        with tempfile.TemporaryDirectory() as directory:
+            db_manager = DatabaseManager(os.path.join(directory, 'import.db'))
+            try:
+                result = db_manager.bulk_import(data)
+                snapshots = {category: db_manager.get_snapshot(category) for category in data}
+                with db_manager.pool.connection() as conn:
+                    stored = {table: conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+                              for table in ('today_hotspot', 'financial_calendar')}
+            finally:
+                db_manager.close()
+    finally:
+        logging.disable(logging.NOTSET)
+
+    for category, table in (('今日热点', 'today_hotspot'), ('财经日历', 'financial_calendar')):
+        keys = {(item['publish_time'], item['title']) for item in data[category] if item['title']}
+        assert len(keys) > 1
+        assert stored[table] == len(keys)
+        assert len(snapshots[category]) == len(keys)
+        assert result['counts'][table] == len(keys)
+    assert result['total'] == sum(stored.values())
+    assert result['skipped'] == 1
+    assert {row['event'] for row in snapshots['财经日历']} == {item['title'] for item in data['财经日历'] if item['title']}
+
+
+def test_bundle_reads_one_import():
+    """读取数据包期间有新的导入提交，meta 和 data 仍来自同一次导入"""
+    logging.disable(logging.INFO)
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            db_file = os.path.join(directory, 'import.db')
+            writer = DatabaseManager(db_file)
+            reader = DatabaseManager(db_file, read_only=True)
+            try:
+                first = writer.bulk_import({'今日热点': crawl('chaosha'), '财经日历': crawl('timeline')})
+                read_snapshot = reader._read_snapshot
+                imported = []
+
+                def read_then_import(conn, category):
+                    rows = read_snapshot(conn, category)
+                    if not imported:
+                        imported.append(writer.bulk_import({'今日热点': crawl('chaosha')[:3],
+                                                            '财经日历': crawl('timeline')[:3]}))
+                    return rows
+
+                reader._read_snapshot = read_then_import
+                bundle = reader.get_bundle(['今日热点', '财经日历'])
+                latest = writer.get_bundle(['今日热点', '财经日历'])
+            finally:
+                reader.close()
+                writer.close()
+    finally:
+        logging.disable(logging.NOTSET)
+
+    assert imported[0]['run_id'] != first['run_id']
+    assert {run['run_id'] for run in bundle['meta']['runs'].values()} == {first['run_id']}
+    assert bundle['meta']['counts'] == {'今日热点': first['counts']['today_hotspot'],
+                                        '财经日历': first['counts']['financial_calendar']}
+    assert latest['meta']['counts'] == {'今日热点': 3, '财经日历': 3}
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+迁移测试 - 在仓库中数据库的副本上执行全部迁移，各类别的最新快照为迁移前最近一次抓取的数据
+"""
+
+import os
+import shutil
+import sqlite3
+import logging
+import tempfile
+
+from database_manager import DatabaseManager, CATEGORY_TABLES
+
+DB_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'hotspot_data.db')
+
+
+def latest_crawl(conn, table, category):
+    """迁移前该类别最近一次抓取的 (crawl_time, 标题/事件) 集合"""
+    column = 'event' if table == 'financial_calendar' else 'title'
+    condition = ''
+    if table == 'hot_news':
+        condition = "WHERE type = '公社热帖'" if category == '公社热帖' else "WHERE type <> '公社热帖'"
+    latest = conn.execute(f'SELECT MAX(crawl_time) FROM {table} {condition}').fetchone()[0]
+    condition = f"{condition} AND" if condition else 'WHERE'
+    return {row[0] for row in conn.execute(
+        f"SELECT {column} FROM {table} {condition} crawl_time >= datetime(?, '-1 minute')", (latest,))}
+
+
+def test_existing_rows_form_latest_snapshots():
+    with tempfile.TemporaryDirectory() as directory:
+        db_file = os.path.join(directory, 'hotspot_data.db')
+        shutil.copyfile(DB_FILE, db_file)
+        conn = sqlite3.connect(db_file)
+        try:
+            expected = {category: latest_crawl(conn, table, category) for category, table in CATEGORY_TABLES.items()}
+        finally:
+            conn.close()
+
+        logging.disable(logging.INFO)
+        db_manager = DatabaseManager(db_file)
+        try:
+            bundle = db_manager.get_bundle()
+            run = db_manager.get_latest_run()
+        finally:
+            db_manager.close()
+            logging.disable(logging.NOTSET)
+
+    assert run['source'] == 'migration'
+    assert bundle['meta']['run_id'] == run['id']
+    for category, titles in expected.items():
+        column = 'event' if category == '财经日历' else 'title'
+        assert titles
+        assert {row[column] for row in bundle['data'][category]} == titles
+        assert run['counts'][category] == len(bundle['data'][category])
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+分页测试 - 按 id 的游标分页在翻页期间有行被再次抓取时不跳过、不重复
+"""
+
+import os
+import logging
+import tempfile
+
+import pytest
+
+from database_manager import DatabaseManager, encode_cursor, decode_cursor
+
+
+def news(index, crawl_time):
+    return {'rank': str(index), 'title': f'新闻{index}', 'link': f'https://example.com/{index}',
+            'publish_time': '2025-09-17', 'heat': f'热度：{index}', 'type': '热点资讯', 'crawl_time': crawl_time}
+
+
+@pytest.fixture
+def db_manager():
+    with tempfile.TemporaryDirectory() as directory:
+        logging.disable(logging.INFO)
+        db_manager = DatabaseManager(os.path.join(directory, 'pagination.db'))
+        try:
+            yield db_manager
+        finally:
+            db_manager.close()
+            logging.disable(logging.NOTSET)
+
+
+def test_reimport_during_walk(db_manager):
+    """翻页期间已读和未读的行被再次抓取，每行仍然恰好出现一次"""
+    rows = [news(i, '2025-09-17 10:00:00') for i in range(10)]
+    db_manager.bulk_import({'热点资讯': rows})
+
+    seen = []
+    page = db_manager.get_hot_news(limit=3)
+    seen.extend(page)
+    # 第一页读完后，一行已读、一行未读的数据被再次抓取到
+    db_manager.bulk_import({'热点资讯': [news(9, '2025-09-17 11:00:00'), news(2, '2025-09-17 11:00:00')]})
+    while page:
+        page = db_manager.get_hot_news(limit=3, cursor=encode_cursor(page[-1]))
+        seen.extend(page)
+
+    titles = [row['title'] for row in seen]
+    assert sorted(titles) == sorted(row['title'] for row in rows)
+    assert len(titles) == len(set(titles))
+
+
+def test_filtered_walk(db_manager):
+    """按类型过滤的列表同样按游标翻完所有行"""
+    db_manager.bulk_import({
+        '热点资讯': [news(i, '2025-09-17 10:00:00') for i in range(5)],
+        '公社热帖': [dict(news(i, '2025-09-17 10:00:00'), title=f'帖子{i}') for i in range(4)],
+    })
+    seen = []
+    page = db_manager.get_hot_news(limit=2, news_type='公社热帖')
+    while page:
+        seen.extend(page)
+        page = db_manager.get_hot_news(limit=2, news_type='公社热帖', cursor=encode_cursor(page[-1]))
+    assert sorted(row['title'] for row in seen) == [f'帖子{i}' for i in range(4)]
+
+
+def test_cursor_format():
+    """游标只编码 id；旧格式的 [created_at, id] 游标仍可使用，格式错误时抛出 ValueError"""
+    assert decode_cursor(encode_cursor({'id': 42})) == 42
+    legacy = 'WyIyMDI1LTA5LTE3IDEwOjAwOjAwIiw0Ml0'  # ["2025-09-17 10:00:00",42]
+    assert decode_cursor(legacy) == 42
+    for bad in ('not-a-cursor', encode_cursor({'id': 'x'})):
+        with pytest.raises(ValueError):
+            decode_cursor(bad)
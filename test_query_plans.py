@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+查询计划回归测试 - 确认 DatabaseManager 的列表和统计查询走索引
+
+用 EXPLAIN QUERY PLAN 检查每条查询使用了预期的索引，
+且没有全表扫描或为 ORDER BY 额外排序。
+"""
+
+import os
+import sys
+import glob
+import json
+import logging
+import tempfile
+
+from database_manager import DatabaseManager, QUERY_SQL, TABLE_COLUMNS
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+CURSOR_ID = 100
+CURSOR_TIME = '2025-09-17 21:05:02'
+WINDOW_START = '2025-09-17 00:00:00'
+
+# 查询名 -> (参数, 预期使用的索引)
+EXPECTED_PLANS = {
+    'hot_news': ((50,), 'SCAN hot_news'),
+    'hot_news_after': ((CURSOR_ID, 50), 'INTEGER PRIMARY KEY'),
+    'hot_news_by_type': (('公社热帖', 50), 'ix_hot_news_type_id'),
+    'hot_news_by_type_after': (('公社热帖', CURSOR_ID, 50), 'ix_hot_news_type_id'),
+    'today_hotspot': ((20,), 'SCAN today_hotspot'),
+    'today_hotspot_after': ((CURSOR_ID, 20), 'INTEGER PRIMARY KEY'),
+    'financial_calendar': ((50,), 'SCAN financial_calendar'),
+    'financial_calendar_after': ((CURSOR_ID, 50), 'INTEGER PRIMARY KEY'),
+    'financial_calendar_by_date': (('2025-09-17', 50), 'ix_financial_calendar_date_id'),
+    'financial_calendar_by_date_after': (('2025-09-17', CURSOR_ID, 50), 'ix_financial_calendar_date_id'),
+    'statistics_by_day': (('2025-09-01',), 'PRIMARY KEY'),
+    'hot_news_hottest': ((WINDOW_START, CURSOR_TIME, 10), 'ix_hot_news_last_seen'),
+    'hot_news_hottest_by_type': (('热点资讯', WINDOW_START, CURSOR_TIME, 10), 'ix_hot_news_type_last_seen'),
+    'today_hotspot_hottest': ((WINDOW_START, CURSOR_TIME, 10), 'ix_today_hotspot_last_seen'),
+    'hot_news_snapshot': ((1, False), 'ix_hot_news_run'),
+    'today_hotspot_snapshot': ((1,), 'ix_today_hotspot_run'),
+    'financial_calendar_snapshot': ((1,), 'ix_financial_calendar_run'),
+}
+
+# 按热度取前N的查询先用索引定位时间窗口，再对窗口内的行排序，允许临时排序
+SORT_ALLOWED = {'hot_news_hottest', 'hot_news_hottest_by_type', 'today_hotspot_hottest'}
+
+# 列表首页沿 rowid 倒序扫描，读满 LIMIT 行即停止，允许不带索引的 SCAN
+ROWID_SCAN_ALLOWED = {'hot_news', 'today_hotspot', 'financial_calendar'}
+
+
+def query_plan(db_manager, name, params):
+    """返回查询计划的描述列表"""
+    with db_manager.pool.connection() as conn:
+        return [row['detail'] for row in conn.execute('EXPLAIN QUERY PLAN ' + QUERY_SQL[name], params)]
+
+
+def check_plans(db_manager):
+    """检查所有查询，返回不符合预期的 (查询名, 查询计划) 列表"""
+    failures = []
+    for name, (params, index) in EXPECTED_PLANS.items():
+        plan = query_plan(db_manager, name, params)
+        uses_index = any(index in detail for detail in plan)
+        full_scan = name not in ROWID_SCAN_ALLOWED and any(
+            detail.startswith('SCAN') and 'INDEX' not in detail for detail in plan)
+        temp_sort = name not in SORT_ALLOWED and any('TEMP B-TREE' in detail for detail in plan)
+        if not uses_index or full_scan or temp_sort:
+            failures.append((name, plan))
+    return failures
+
+
+def _new_database(directory):
+    logging.disable(logging.INFO)
+    try:
+        return DatabaseManager(os.path.join(directory, 'plans.db'))
+    finally:
+        logging.disable(logging.NOTSET)
+
+
+def test_every_query_has_a_plan_expectation():
+    """新增查询时必须同时补充查询计划断言"""
+    assert set(EXPECTED_PLANS) == set(QUERY_SQL)
+
+
+def test_query_plans_on_empty_database():
+    """空库上所有查询都走索引"""
+    with tempfile.TemporaryDirectory() as directory:
+        db_manager = _new_database(directory)
+        try:
+            assert check_plans(db_manager) == []
+        finally:
+            db_manager.close()
+
+
+def test_projectable_columns_match_schema():
+    """fields= 投影的列清单与迁移后的表结构一致"""
+    with tempfile.TemporaryDirectory() as directory:
+        db_manager = _new_database(directory)
+        try:
+            with db_manager.pool.connection() as conn:
+                for table, columns in TABLE_COLUMNS.items():
+                    schema = {row['name'] for row in conn.execute(f'PRAGMA table_info({table})')}
+                    assert set(columns) == schema, table
+        finally:
+            db_manager.close()
+
+
+def test_query_plans_after_analyze():
+    """导入历史数据并 ANALYZE 之后，查询仍然走索引"""
+    with tempfile.TemporaryDirectory() as directory:
+        db_manager = _new_database(directory)
+        try:
+            logging.disable(logging.INFO)
+            for json_file in sorted(glob.glob(os.path.join(BASE_DIR, '*hotspot_data*.json'))):
+                with open(json_file, 'r', encoding='utf-8') as f:
+                    db_manager.bulk_import(json.load(f))
+            logging.disable(logging.NOTSET)
+
+            with db_manager.pool.connection() as conn:
+                conn.execute('ANALYZE')
+                conn.commit()
+            assert check_plans(db_manager) == []
+        finally:
+            db_manager.close()
+
+
+def main():
+    """主函数"""
+    with tempfile.TemporaryDirectory() as directory:
+        db_manager = _new_database(directory)
+        for name, (params, index) in EXPECTED_PLANS.items():
+            plan = query_plan(db_manager, name, params)
+            ok = any(index in detail for detail in plan)
+            print(f"{'✅' if ok else '❌'} {name}: {'; '.join(plan)}")
+        failures = check_plans(db_manager)
+        db_manager.close()
+    return not failures
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
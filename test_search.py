@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+全文搜索测试 - 2个字的关键词走双字索引并按 BM25 排序，摘要经过HTML转义
+"""
+
+import os
+import logging
+import tempfile
+
+from database_manager import DatabaseManager
+
+ROWS = [
+    {'rank': '1', 'title': '国产AI芯片亮剑，算力产业链景气', 'link': 'a', 'publish_time': '2025-09-17',
+     'heat': '热度：100', 'type': 'ths', 'crawl_time': '2025-09-17 10:00:00'},
+    {'rank': '2', 'title': '<b>芯片</b> & 存储', 'link': 'b', 'publish_time': '2025-09-17',
+     'heat': '热度：50', 'type': 'ths', 'crawl_time': '2025-09-17 10:00:00'},
+    {'rank': '3', 'title': '黄金再创纪录', 'link': 'c', 'publish_time': '2025-09-17',
+     'heat': '热度：10', 'type': 'ths', 'crawl_time': '2025-09-17 10:00:00'},
+]
+
+
+def _search(*queries):
+    with tempfile.TemporaryDirectory() as directory:
+        logging.disable(logging.INFO)
+        db_manager = DatabaseManager(os.path.join(directory, 'search.db'))
+        try:
+            db_manager.bulk_import({'热点资讯': ROWS})
+            return [db_manager.search(query) for query in queries]
+        finally:
+            db_manager.close()
+            logging.disable(logging.NOTSET)
+
+
+def test_two_character_terms_are_ranked():
+    """2个字的中文词和字母词都有 BM25 分数，不再退回到 LIKE"""
+    chips, ai, mixed = _search('芯片', 'AI', '芯片 算力')
+    assert {row['title'] for row in chips} == {ROWS[0]['title'], ROWS[1]['title']}
+    assert all(row['score'] is not None for row in chips + ai + mixed)
+    assert [row['title'] for row in ai] == [ROWS[0]['title']]
+    assert [row['title'] for row in mixed] == [ROWS[0]['title']]
+
+
+def test_snippet_is_escaped():
+    """标题中的HTML被转义，只有关键词高亮是标签"""
+    short, long = _search('芯片 存储', '<b>芯片')
+    assert short[0]['snippet'] == '&lt;b&gt;<mark>芯片</mark>&lt;/b&gt; &amp; <mark>存储</mark>'
+    assert long[0]['snippet'] == '<mark>&lt;b&gt;芯片</mark>&lt;/b&gt; &amp; 存储'
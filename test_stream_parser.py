@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+流式提取器回归测试 - 在保存的接口响应上对比流式提取器与DOM解析器的输出
+"""
+
+import os
+import json
+import logging
+
+import pytest
+
+import stream_parser
+from hotspot_crawler import HotSpotCrawler
+from complete_hotspot_crawler import CompleteHotSpotCrawler
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def load_fixture(news_type):
+    with open(os.path.join(FIXTURE_DIR, f'{news_type}.json'), 'r', encoding='utf-8') as f:
+        return json.load(f)['html']
+
+
+def strip_time(records):
+    return [{k: v for k, v in record.items() if k != 'crawl_time'} for record in records]
+
+
+@pytest.mark.parametrize('crawler_class', [HotSpotCrawler, CompleteHotSpotCrawler])
+@pytest.mark.parametrize('news_type', ['ths', 'jiuyan'])
+def test_stream_matches_dom_parser(crawler_class, news_type):
+    """流式后端与 html.parser 后端解析出相同的记录"""
+    html_content = load_fixture(news_type)
+    logging.disable(logging.INFO)
+    try:
+        dom = crawler_class(parser_backend='html.parser').parse_hot_news(html_content, news_type)
+        stream = crawler_class(parser_backend='stream').parse_hot_news(html_content, news_type)
+    finally:
+        logging.disable(logging.NOTSET)
+    assert stream
+    assert strip_time(stream) == strip_time(dom)
+
+
+def test_iter_hot_items_accepts_chunks():
+    """按任意位置切分的HTML逐块喂入，结果与整页解析相同"""
+    html_content = load_fixture('ths')
+    chunks = [html_content[i:i + 97] for i in range(0, len(html_content), 97)]
+    assert list(stream_parser.iter_hot_items(chunks)) == list(stream_parser.iter_hot_items(html_content))